@@ -0,0 +1,130 @@
+"""Alert book: price alerts indexed by symbol and threshold.
+
+Each symbol keeps its "below" alerts in a max-heap and its "above" alerts in
+a min-heap keyed by target price, so a new price only touches the alerts it
+actually crossed: O(log n) per crossed alert, nothing for the rest. Tens of
+thousands of alerts (per-lot ladders, trailing levels) cost the same per
+tick as a handful.
+
+Alerts are the bots' ALERTS dicts (symbol, target_price, condition, ...).
+The book holds the live ones; ``pop_crossed`` takes crossed alerts out so
+they cannot fire twice, and the caller puts them back with ``add`` if the
+order fails. Removal and modification are lazy (the old heap entry is marked
+dead and skipped when it reaches the top).
+"""
+import heapq
+import itertools
+
+CONDITIONS = ("below", "above")
+
+
+class AlertBook:
+    def __init__(self, alerts=()):
+        self._alerts = {}  # alert id -> alert dict (live alerts only)
+        self._entries = {}  # alert id -> its heap entry [key, seq, id, alert]
+        self._below = {}  # symbol -> max-heap of [-target, seq, id, alert]
+        self._above = {}  # symbol -> min-heap of [target, seq, id, alert]
+        self._live = {}  # symbol -> number of live alerts
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()  # insertion order; breaks ties between equal targets
+        for alert in alerts:
+            if not alert.get('triggered'):
+                self.add(alert)
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def __contains__(self, alert_id):
+        return alert_id in self._alerts
+
+    def __iter__(self):
+        return iter(list(self._alerts.values()))
+
+    def get(self, alert_id):
+        return self._alerts.get(alert_id)
+
+    def symbols(self):
+        """Symbols with at least one live alert"""
+        return list(self._live)
+
+    # ========== CHANGES ==========
+
+    def add(self, alert):
+        """Index ``alert``; returns its id (``alert['id']``, assigned if missing)"""
+        if alert['condition'] not in CONDITIONS:
+            raise ValueError(f"Unknown condition '{alert['condition']}' (use 'below' or 'above')")
+        alert_id = alert.get('id')
+        if alert_id is None:
+            alert_id = alert['id'] = next(self._ids)
+        if alert_id in self._alerts:
+            raise ValueError(f"Alert {alert_id} is already in the book")
+
+        symbol, target = alert['symbol'], float(alert['target_price'])
+        if alert['condition'] == "below":
+            entry = [-target, next(self._seq), alert_id, alert]
+            heapq.heappush(self._below.setdefault(symbol, []), entry)
+        else:
+            entry = [target, next(self._seq), alert_id, alert]
+            heapq.heappush(self._above.setdefault(symbol, []), entry)
+
+        self._alerts[alert_id] = alert
+        self._entries[alert_id] = entry
+        self._live[symbol] = self._live.get(symbol, 0) + 1
+        return alert_id
+
+    def remove(self, alert_id):
+        """Take a live alert out of the book and return it"""
+        alert = self._alerts.pop(alert_id)
+        self._entries.pop(alert_id)[3] = None  # dead; skipped when it surfaces
+        self._forget(alert['symbol'])
+        return alert
+
+    def modify(self, alert_id, **changes):
+        """Change fields of a live alert (target, condition, quantity...) and re-index it"""
+        alert = self.remove(alert_id)
+        old = dict(alert)
+        alert.update(changes)
+        try:
+            self.add(alert)
+        except ValueError:
+            alert.clear()
+            alert.update(old)
+            self.add(alert)
+            raise
+        return alert
+
+    def _forget(self, symbol):
+        self._live[symbol] -= 1
+        if not self._live[symbol]:
+            del self._live[symbol]
+            self._below.pop(symbol, None)
+            self._above.pop(symbol, None)
+
+    # ========== LOOKUPS ==========
+
+    @staticmethod
+    def _top(heap):
+        while heap and heap[0][3] is None:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def pop_crossed(self, symbol, price):
+        """Remove and return the alerts on ``symbol`` crossed by ``price``.
+
+        Below alerts fire at ``price <= target``, above alerts at ``price >= target``;
+        each group comes out in the order its targets were crossed.
+        """
+        crossed = []
+        below = self._below.get(symbol)
+        while below and (top := self._top(below)) is not None and -top[0] >= price:
+            crossed.append(self.remove(top[2]))
+        above = self._above.get(symbol)
+        while above and (top := self._top(above)) is not None and top[0] <= price:
+            crossed.append(self.remove(top[2]))
+        return crossed
+
+    def nearest(self, symbol):
+        """``(highest below target, lowest above target)`` for ``symbol``; None if absent"""
+        below = self._top(self._below.get(symbol, []))
+        above = self._top(self._above.get(symbol, []))
+        return (-below[0] if below else None), (above[0] if above else None)
@@ -0,0 +1,142 @@
+"""Crash-safe alert state for the price bots.
+
+The ``triggered`` flags in ALERTS only live in memory, so a restart used to
+re-evaluate everything and could send the same market order twice. This
+store keeps them in SQLite (WAL mode, fsync on commit):
+
+* ``begin`` records the crossed alerts as "sending" in ONE commit before any
+  order goes out - a ladder crossed by a single tick costs one fsync;
+* ``finish`` records the order id ("placed") or clears a failed attempt.
+  These writes are buffered and committed together (every ``flush_every``
+  results or ``flush_seconds``), since "sending" already blocks a repeat;
+* ``restore`` reloads everything with one query on startup and marks the
+  alerts done. An alert still "sending" after a crash may or may not have
+  reached the broker: it is held back (never re-fired automatically) and
+  reported so it can be checked in the order book;
+* ``release`` settles a held-back alert once the order book has been
+  checked: re-armed if the order never arrived, or recorded as placed.
+
+Alerts are identified by their content (symbol, condition, target, action,
+quantity), so editing an alert in ALERTS makes it a new one.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+STATE_PATH = "alert_state.sqlite3"
+
+SENDING = "sending"
+PLACED = "placed"
+
+
+def alert_key(alert):
+    """Stable id for an alert from the fields that define it"""
+    fields = [alert['symbol'], alert['condition'], float(alert['target_price']),
+              alert['action'], alert['quantity']]
+    return hashlib.sha1(json.dumps(fields).encode('utf-8')).hexdigest()[:16]
+
+
+class AlertState:
+    def __init__(self, path=STATE_PATH, flush_every=64, flush_seconds=1.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._buffer = []  # (sql, params) waiting for the next commit
+        self._oldest = None
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")  # fsync every commit
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS alerts ("
+            " key TEXT PRIMARY KEY, symbol TEXT, status TEXT, order_id TEXT,"
+            " price REAL, updated REAL)"
+        )
+
+    def _commit(self, statements):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                self.db.execute(sql, params)
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    # ========== STARTUP ==========
+
+    def restore(self, alerts):
+        """Give every alert its ``id`` and mark stored triggers; returns held-back alerts"""
+        saved = {key: (status, order_id) for key, status, order_id
+                 in self.db.execute("SELECT key, status, order_id FROM alerts")}
+        seen = {}
+        unknown = []
+        for alert in alerts:
+            key = alert_key(alert)
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:  # identical alerts listed twice stay distinct
+                key = f"{key}-{seen[key]}"
+            alert['id'] = key
+
+            status, order_id = saved.get(key, (None, None))
+            if status == PLACED:
+                alert['triggered'] = True
+                alert['order_id'] = order_id
+            elif status == SENDING:
+                alert['triggered'] = True
+                unknown.append(alert)
+        return unknown
+
+    def release(self, alert_id, order_id=None):
+        """Settle an alert held back as "sending"; returns False if it is not held.
+
+        With ``order_id`` the order did reach the broker and is recorded as
+        placed; without, the attempt is dropped and the alert fires again.
+        """
+        self.flush()
+        row = self.db.execute("SELECT status FROM alerts WHERE key = ?", (alert_id,)).fetchone()
+        if row is None or row[0] != SENDING:
+            return False
+        if order_id:
+            self._commit([("UPDATE alerts SET status = ?, order_id = ?, updated = ? WHERE key = ?",
+                           (PLACED, str(order_id), time.time(), alert_id))])
+        else:
+            self._commit([("DELETE FROM alerts WHERE key = ?", (alert_id,))])
+        return True
+
+    # ========== ORDERS ==========
+
+    def begin(self, alerts, price):
+        """Durably record ``alerts`` as being sent, before the orders go out"""
+        if not alerts:
+            return
+        now = time.time()
+        self._commit(self._buffer + [
+            ("INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, NULL, ?, ?)",
+             (alert['id'], alert['symbol'], SENDING, price, now))
+            for alert in alerts
+        ])
+        self._buffer, self._oldest = [], None
+
+    def finish(self, alert, order_id):
+        """Record an order result (buffered; a failed attempt may be retried)"""
+        if order_id:
+            self._buffer.append(("UPDATE alerts SET status = ?, order_id = ?, updated = ? WHERE key = ?",
+                                 (PLACED, str(order_id), time.time(), alert['id'])))
+            alert['order_id'] = order_id
+        else:
+            self._buffer.append(("DELETE FROM alerts WHERE key = ?", (alert['id'],)))
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._oldest >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._commit(self._buffer)
+            self._buffer, self._oldest = [], None
+
+    def close(self):
+        self.flush()
+        self.db.close()
@@ -1,8 +1,14 @@
 from kiteconnect import KiteConnect
+import argparse
+import asyncio
 import json
 import time
 from datetime import datetime
 
+import tick_engine
+from alert_book import AlertBook
+from alert_state import AlertState
+
 # Load saved token
 def load_token():
     with open('access_token.json', 'r') as f:
@@ -90,14 +96,32 @@ ALERTS = [
 
 # ========== BOT FUNCTIONS ==========
 
+# Kite's quote endpoint takes up to 500 instruments per request
+QUOTE_BATCH_SIZE = 500
+
+
+def get_live_prices(symbols):
+    """Get current market prices for many symbols in as few requests as possible"""
+    symbols = list(dict.fromkeys(symbols))  # de-duplicate, keep order
+    prices = {}
+    for i in range(0, len(symbols), QUOTE_BATCH_SIZE):
+        batch = symbols[i:i + QUOTE_BATCH_SIZE]
+        try:
+            quotes = kite.quote(batch)
+        except Exception as e:
+            print(f"❌ Error fetching {len(batch)} quotes: {e}")
+            continue
+        for symbol in batch:
+            if symbol in quotes:
+                prices[symbol] = quotes[symbol]['last_price']
+            else:
+                print(f"❌ No quote for {symbol}")
+    return prices
+
+
 def get_live_price(symbol):
     """Get current market price"""
-    try:
-        quote = kite.quote(symbol)
-        return quote[symbol]['last_price']
-    except Exception as e:
-        print(f"❌ Error fetching {symbol}: {e}")
-        return None
+    return get_live_prices([symbol]).get(symbol)
 
 
 def place_order(symbol, action, quantity):
@@ -119,59 +143,146 @@ def place_order(symbol, action, quantity):
         return None
 
 
+def execute_alert(alert, current_price):
+    """Place the order for a crossed alert; returns the order id"""
+    print(f"   🚨 ALERT! Executing {alert['action']} {alert['quantity']} shares...")
+    return place_order(alert['symbol'], alert['action'], alert['quantity'])
+
+
+def simulate_alert(alert, current_price):
+    """Replay / mock runs never send real orders"""
+    print(f"   🔔 SIMULATION: {alert['action']} {alert['quantity']} {alert['symbol']} @ ₹{current_price:.2f}")
+    return "SIMULATED"
+
+
+def show_status(symbol, current_price):
+    """Price against the nearest targets on either side"""
+    below, above = book.nearest(symbol)
+    targets = []
+    if below is not None:
+        targets.append(f"📉 ₹{below} (below)")
+    if above is not None:
+        targets.append(f"📈 ₹{above} (above)")
+    print(f"{symbol}: ₹{current_price:.2f} → Next: {' | '.join(targets)}")
+
+
 def check_alerts():
     """Check all price alerts"""
     print(f"\n⏰ {datetime.now().strftime('%d-%b %H:%M:%S')}")
     print("-" * 60)
 
-    for alert in ALERTS:
-        if alert['triggered']:
-            continue
+    # One snapshot for every pending symbol (a request per 500, not per alert)
+    prices = get_live_prices(book.symbols())
 
-        symbol = alert['symbol']
-        current_price = get_live_price(symbol)
+    for symbol, current_price in prices.items():
+        show_status(symbol, current_price)
 
-        if current_price is None:
+        # Only the alerts this price crossed come out of the book; they are
+        # recorded as being sent before any order goes out
+        crossed = book.pop_crossed(symbol, current_price)
+        try:
+            state.begin(crossed, current_price)
+        except Exception as e:
+            # Nothing was sent: put them back and try again next cycle
+            for alert in crossed:
+                book.add(alert)
+            print(f"   ❌ Could not record triggers for {symbol}: {e}")
             continue
+        for alert in crossed:
+            order_id = execute_alert(alert, current_price)
+            state.finish(alert, order_id)
+            if order_id:
+                alert['triggered'] = True
+            else:
+                book.add(alert)  # retry next cycle
 
-        target = alert['target_price']
-        condition = alert['condition']
-        action = alert['action']
+    state.flush()
 
-        # Show status
-        status = "📉" if condition == "below" else "📈"
-        print(f"{status} {symbol}: ₹{current_price:.2f} → Target: ₹{target} ({condition})")
 
-        # Check trigger
-        triggered = False
-        if condition == "below" and current_price <= target:
-            triggered = True
-        elif condition == "above" and current_price >= target:
-            triggered = True
-
-        if triggered:
-            print(f"   🚨 ALERT! Executing {action} {alert['quantity']} shares...")
-            order_id = place_order(symbol, action, alert['quantity'])
-            if order_id:
-                alert['triggered'] = True
+def report_done():
+    """Final message once the book is empty (held-back alerts are not counted as triggered)"""
+    if held:
+        print(f"\n⏸️ No alerts left to monitor, but {len(held)} held back until released "
+              f"(--release). Stopping bot.")
+    else:
+        print("\n✅ All alerts triggered! Stopping bot.")
 
 
 # ========== MAIN LOOP ==========
 
+parser = argparse.ArgumentParser(description="Kite price alert bot")
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument("--stream", action="store_true",
+                  help="react to live KiteTicker ticks instead of polling every 30 s")
+mode.add_argument("--replay", metavar="CSV",
+                  help="replay recorded ticks (timestamp,symbol,price); orders are simulated")
+mode.add_argument("--mock", action="store_true",
+                  help="random-walk ticks around the targets; orders are simulated")
+parser.add_argument("--speed", type=float, default=1.0,
+                    help="replay speed multiplier (0 = as fast as possible)")
+parser.add_argument("--release", metavar="ID[=ORDER_ID]", nargs="+", default=[],
+                    help="settle alerts held back after a crash, once checked in the order book: "
+                         "ID re-arms the alert, ID=ORDER_ID records the order as placed")
+args = parser.parse_args()
+
+# Triggers and order ids survive restarts (replay / mock runs stay in memory)
+state = None if args.replay or args.mock else AlertState()
+if args.release and state is None:
+    parser.error("--release needs the saved state (not available with --replay / --mock)")
+held = []
+if state is not None:
+    for item in args.release:
+        alert_id, _, order_id = item.partition("=")
+        if state.release(alert_id, order_id or None):
+            print(f"🔓 {alert_id}: " + (f"recorded as placed (order {order_id})" if order_id else "re-armed"))
+        else:
+            print(f"⚠️  {alert_id}: not held back, nothing to release")
+    held = state.restore(ALERTS)
+    for alert in held:
+        print(f"⚠️  {alert['symbol']} {alert['action']} {alert['quantity']} [{alert['id']}]: order status "
+              f"unknown after a restart - held back; check the order book, then --release {alert['id']}[=ORDER_ID]")
+    done = sum(a['triggered'] for a in ALERTS) - len(held)
+    print(f"📂 Restored state: {done} of {len(ALERTS)} alerts already done, {len(held)} held back")
+
+# Untriggered alerts indexed by symbol and target price
+book = AlertBook(ALERTS)
+
 print("\n🤖 Price Alert Bot Running...")
-print("Monitoring:", len(ALERTS), "alerts")
+print("Monitoring:", len(book), "alerts")
 print("Press Ctrl+C to stop\n")
 print("=" * 60)
 
-try:
-    while True:
-        check_alerts()
+if args.stream or args.replay or args.mock:
+    engine = tick_engine.TickEngine(book, execute_alert if args.stream else simulate_alert, state=state)
+    if args.stream:
+        feed = tick_engine.KiteTickerFeed(kite, api_key, token_data['access_token'], engine.symbols())
+    elif args.replay:
+        feed = tick_engine.ReplayFeed(args.replay, speed=args.speed)
+    else:
+        feed = tick_engine.MockFeed({a['symbol']: a['target_price'] for a in ALERTS})
+
+    try:
+        asyncio.run(engine.run(feed))
+        if engine.done():
+            report_done()
+        else:
+            print(f"\n⏹️ Feed ended after {engine.ticks} ticks")
+    except KeyboardInterrupt:
+        print(f"\n⛔ Bot stopped by user | Ticks processed: {engine.ticks}")
+
+else:
+    try:
+        while True:
+            check_alerts()
+
+            if not book:
+                report_done()
+                break
 
-        if all(alert['triggered'] for alert in ALERTS):
-            print("\n✅ All alerts triggered! Stopping bot.")
-            break
+            time.sleep(30)  # Check every 30 seconds
 
-        time.sleep(30)  # Check every 30 seconds
+    except KeyboardInterrupt:
+        print("\n⛔ Bot stopped by user")
 
-except KeyboardInterrupt:
-    print("\n⛔ Bot stopped by user")
+if state is not None:
+    state.close()
@@ -0,0 +1,290 @@
+"""Tick-driven alert engine for the price bots.
+
+Instead of polling every 30-60 s, the bots can subscribe to a streaming
+feed and evaluate their alerts on every tick inside an asyncio loop, so a
+stop loss reacts within milliseconds of the price arriving.
+
+Feeds are async iterators of ``Tick``:
+
+* ``KiteTickerFeed``  - Kite's websocket (KiteTicker, LTP mode)
+* ``YahooStreamFeed`` - Yahoo Finance's websocket (yfinance >= 0.2.54)
+* ``ReplayFeed``      - ticks recorded in a CSV (timestamp,symbol,price)
+* ``MockFeed``        - random walk around given prices, for testing
+
+Orders are placed on a worker thread so a slow broker call never holds up
+the next tick.
+"""
+import asyncio
+import csv
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from alert_book import AlertBook
+
+# Tick: symbol as used in ALERTS, last traded price, time.monotonic() on arrival
+Tick = namedtuple("Tick", ["symbol", "price", "received"])
+
+# A failed order is retried on a later tick, but not more often than this
+RETRY_SECONDS = 30
+
+
+# ========== ENGINE ==========
+
+class TickEngine:
+    """Evaluate alerts on every tick and execute crossed ones.
+
+    ``alerts`` is an ``AlertBook`` (or a list of ALERTS dicts to build one);
+    each tick only touches the alerts it crossed. ``execute(alert, price)``
+    is a blocking call returning an order id (or None on failure);
+    successful alerts are marked ``triggered``. With an ``AlertState``,
+    triggers and order ids are persisted so a restart cannot repeat them.
+    """
+
+    def __init__(self, alerts, execute, log=print, state=None):
+        self.book = alerts if isinstance(alerts, AlertBook) else AlertBook(alerts)
+        self.execute = execute
+        self.log = log
+        self.state = state
+        self._flush_scheduled = False
+        self.inflight = set()  # alert ids whose order is being placed
+        self.waiting = set()  # alert ids whose order failed, re-added after RETRY_SECONDS
+        self.ticks = 0
+        self._pending = set()
+        self._stop = None
+
+    def symbols(self):
+        """Symbols that still have untriggered alerts"""
+        return self.book.symbols()
+
+    def done(self):
+        return not self.book and not self.inflight and not self.waiting
+
+    def on_tick(self, tick):
+        self.ticks += 1
+        # Crossed alerts leave the book, so they cannot fire again while in flight
+        crossed = self.book.pop_crossed(tick.symbol, tick.price)
+        if crossed and self.state is not None:
+            try:
+                self.state.begin(crossed, tick.price)  # one commit per tick, before any order
+            except Exception as e:
+                # Nothing was sent: put them back so the next tick tries again
+                for alert in crossed:
+                    self.book.add(alert)
+                self.log(f"❌ Could not record {len(crossed)} trigger(s) on {tick.symbol}: {e}")
+                return
+        for alert in crossed:
+            self.inflight.add(alert['id'])
+            latency_ms = (time.monotonic() - tick.received) * 1000
+            self.log(f"⚡ {tick.symbol}: ₹{tick.price:.2f} crossed ₹{alert['target_price']} "
+                     f"({alert['condition']}) - reacting in {latency_ms:.1f} ms")
+            task = asyncio.ensure_future(self._fire(alert, tick.price))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _fire(self, alert, price):
+        loop = asyncio.get_running_loop()
+        try:
+            order_id = await loop.run_in_executor(None, self.execute, alert, price)
+        except Exception as e:
+            self.log(f"   ❌ Execution failed: {e}")
+            order_id = None
+        finally:
+            self.inflight.discard(alert['id'])
+
+        if self.state is not None:
+            self.state.finish(alert, order_id)
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                loop.call_later(self.state.flush_seconds, self._flush)
+
+        if order_id:
+            alert['triggered'] = True
+            if self.done():
+                self._stop.set()
+        else:
+            self.waiting.add(alert['id'])
+            loop.call_later(RETRY_SECONDS, self._retry, alert)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        self.state.flush()
+
+    def _retry(self, alert):
+        self.waiting.discard(alert['id'])
+        if not alert['triggered'] and alert['id'] not in self.book:
+            self.book.add(alert)
+
+    async def _consume(self, feed):
+        async for tick in feed:
+            self.on_tick(tick)
+
+    async def run(self, feed):
+        """Process ``feed`` until it ends or every alert has triggered"""
+        self._stop = asyncio.Event()
+        if self.done():
+            return
+        consumer = asyncio.ensure_future(self._consume(feed))
+        stopper = asyncio.ensure_future(self._stop.wait())
+        try:
+            await asyncio.wait({consumer, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            consumer.cancel()
+            stopper.cancel()
+            await asyncio.gather(consumer, stopper, return_exceptions=True)
+            # Let orders already sent finish before returning
+            await asyncio.gather(*self._pending, return_exceptions=True)
+            if self.state is not None:
+                self.state.flush()
+        if not consumer.cancelled() and consumer.exception() is not None:
+            raise consumer.exception()
+
+
+# ========== FEEDS ==========
+
+class KiteTickerFeed:
+    """Live LTP ticks from Kite's websocket for ``symbols`` ("NSE:ALSTONE")"""
+
+    def __init__(self, kite, api_key, access_token, symbols):
+        self.kite = kite
+        self.api_key = api_key
+        self.access_token = access_token
+        self.symbols = list(dict.fromkeys(symbols))
+
+    def _resolve(self):
+        """``{instrument_token: symbol}`` plus current prices, via the LTP endpoint"""
+        tokens, prices = {}, {}
+        for i in range(0, len(self.symbols), 1000):  # LTP takes 1000 per request
+            ltp = self.kite.ltp(self.symbols[i:i + 1000])
+            for symbol, data in ltp.items():
+                tokens[data['instrument_token']] = symbol
+                prices[symbol] = data['last_price']
+        return tokens, prices
+
+    async def __aiter__(self):
+        from kiteconnect import KiteTicker
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        tokens, prices = await loop.run_in_executor(None, self._resolve)
+        now = time.monotonic()
+        for symbol, price in prices.items():  # evaluate once before the first tick
+            yield Tick(symbol, price, now)
+
+        ticker = KiteTicker(self.api_key, self.access_token)
+
+        def on_ticks(ws, ticks):
+            received = time.monotonic()
+            for t in ticks:
+                symbol = tokens.get(t['instrument_token'])
+                if symbol is not None:
+                    loop.call_soon_threadsafe(queue.put_nowait, Tick(symbol, t['last_price'], received))
+
+        def on_connect(ws, response):
+            # Also runs after every automatic reconnect
+            ws.subscribe(list(tokens))
+            ws.set_mode(ws.MODE_LTP, list(tokens))
+            print(f"🔌 Streaming {len(tokens)} instruments")
+
+        def on_error(ws, code, reason):
+            print(f"❌ Ticker error {code}: {reason}")
+
+        ticker.on_ticks = on_ticks
+        ticker.on_connect = on_connect
+        ticker.on_error = on_error
+        ticker.connect(threaded=True)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            ticker.close()
+
+
+class YahooStreamFeed:
+    """Live ticks from Yahoo Finance's websocket for Yahoo tickers ("ALSTONE.NS")"""
+
+    def __init__(self, symbols):
+        self.symbols = list(dict.fromkeys(symbols))
+
+    async def __aiter__(self):
+        import yfinance as yf
+
+        if not hasattr(yf, "AsyncWebSocket"):
+            raise RuntimeError("Streaming needs yfinance >= 0.2.54 (pip install -U yfinance)")
+
+        queue = asyncio.Queue()
+
+        def on_message(message):
+            price = message.get('price')
+            if message.get('id') in self.symbols and price is not None:
+                queue.put_nowait(Tick(message['id'], round(float(price), 2), time.monotonic()))
+
+        async with yf.AsyncWebSocket(verbose=False) as ws:
+            await ws.subscribe(self.symbols)
+            listener = asyncio.ensure_future(ws.listen(on_message))
+            try:
+                while True:
+                    getter = asyncio.ensure_future(queue.get())
+                    await asyncio.wait({getter, listener}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        listener.result()  # re-raise why the socket stopped
+                        return
+                    yield getter.result()
+            finally:
+                listener.cancel()
+
+
+class ReplayFeed:
+    """Ticks from a CSV with ``timestamp,symbol,price`` columns.
+
+    ``speed`` scales the recorded gaps between ticks (2 = twice as fast);
+    0 replays as fast as possible. Timestamps are ISO dates or epoch seconds.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+    @staticmethod
+    def _seconds(value):
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+
+    async def __aiter__(self):
+        with open(self.path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        previous = None
+        for row in rows:
+            stamp = self._seconds(row['timestamp'])
+            if self.speed and previous is not None and stamp > previous:
+                await asyncio.sleep((stamp - previous) / self.speed)
+            else:
+                await asyncio.sleep(0)
+            previous = stamp
+            yield Tick(row['symbol'], float(row['price']), time.monotonic())
+
+
+class MockFeed:
+    """Random-walk ticks starting at ``prices`` ({symbol: price})"""
+
+    def __init__(self, prices, interval=0.2, volatility=0.01, seed=None, limit=None):
+        self.prices = dict(prices)
+        self.interval = interval
+        self.volatility = volatility
+        self.random = random.Random(seed)
+        self.limit = limit
+
+    async def __aiter__(self):
+        symbols = list(self.prices)
+        count = 0
+        while self.limit is None or count < self.limit:
+            await asyncio.sleep(self.interval)
+            symbol = self.random.choice(symbols)
+            price = self.prices[symbol] * (1 + self.random.gauss(0, self.volatility))
+            self.prices[symbol] = price = max(0.0001, round(price, 4))
+            count += 1
+            yield Tick(symbol, price, time.monotonic())
@@ -1,9 +1,16 @@
 from kiteconnect import KiteConnect
+import argparse
+import asyncio
 import json
 import time
 from datetime import datetime
+import pandas as pd
 import yfinance as yf
 
+import tick_engine
+from alert_book import AlertBook
+from alert_state import AlertState
+
 
 # Load saved token
 def load_token():
@@ -151,32 +158,51 @@ ALERTS = [
         "triggered": False
     }
 ]
+NSE_NAMES = {alert['symbol']: alert['nse_symbol'] for alert in ALERTS}
 
 
 # ========== BOT FUNCTIONS ==========
 
-def get_live_price(symbol):
-    """Get current price from Yahoo Finance - COMPLETELY FREE"""
+def download_last_closes(symbols, **params):
+    """Last close per symbol from ONE multi-ticker download (symbols without data are left out)"""
     try:
-        ticker = yf.Ticker(symbol)
+        data = yf.download(symbols, group_by='ticker', threads=True, progress=False, **params)
+    except Exception as e:
+        print(f"❌ Yahoo download failed: {e}")
+        return {}
+
+    prices = {}
+    for symbol in symbols:
+        try:
+            # Ticker-level columns, except for a single ticker on older yfinance
+            closes = data[symbol]['Close'] if isinstance(data.columns, pd.MultiIndex) else data['Close']
+        except KeyError:
+            continue
+        closes = closes.dropna()  # rows are the union of all tickers' timestamps
+        if not closes.empty:
+            prices[symbol] = round(float(closes.iloc[-1]), 2)
+    return prices
 
-        # Try intraday data first
-        hist = ticker.history(period='1d', interval='5m')
 
-        if not hist.empty:
-            price = hist['Close'].iloc[-1]
-            return round(price, 2)
+def get_live_prices(symbols):
+    """Get current prices from Yahoo Finance - one round trip for all symbols"""
+    symbols = list(dict.fromkeys(symbols))  # each ticker downloaded once per cycle
+    if not symbols:
+        return {}
 
-        # Fallback to daily
-        hist = ticker.history(period='5d')
-        if not hist.empty:
-            price = hist['Close'].iloc[-1]
-            return round(price, 2)
+    # Try intraday data first
+    prices = download_last_closes(symbols, period='1d', interval='5m')
 
-        return None
+    # Fallback to daily (funds and illiquid stocks have no intraday bars)
+    no_intraday = [symbol for symbol in symbols if symbol not in prices]
+    if no_intraday:
+        prices.update(download_last_closes(no_intraday, period='5d'))
+    return prices
 
-    except Exception as e:
-        return None
+
+def get_live_price(symbol):
+    """Get current price from Yahoo Finance - COMPLETELY FREE"""
+    return get_live_prices([symbol]).get(symbol)
 
 
 def place_order(nse_symbol, action, quantity):
@@ -186,70 +212,150 @@ def place_order(nse_symbol, action, quantity):
     return "SIMULATED"
 
 
+def execute_alert(alert, current_price):
+    """Place the order for a crossed alert; returns the order id"""
+    print(f"   🚨 ALERT! {alert['nse_symbol']} hit ₹{current_price:.2f}")
+    return place_order(alert['nse_symbol'], alert['action'], alert['quantity'])
+
+
+def show_status(symbol, current_price):
+    """Price against the nearest targets on either side"""
+    below, above = book.nearest(symbol)
+    targets = []
+    for status, target in (("📉", below), ("📈", above)):
+        if target is not None:
+            diff_pct = (current_price - target) / target * 100
+            targets.append(f"{status} ₹{target:.2f} ({diff_pct:+.1f}%)")
+    print(f"{NSE_NAMES[symbol]}: ₹{current_price:.2f} → Targets: {' | '.join(targets)}")
+
+
 def check_alerts():
     """Check all price alerts"""
     print(f"\n⏰ {datetime.now().strftime('%d-%b %H:%M:%S')}")
     print("-" * 60)
 
-    for alert in ALERTS:
-        if alert['triggered']:
-            continue
-
-        symbol = alert['symbol']
-        nse_symbol = alert['nse_symbol']
+    prices = get_live_prices(book.symbols())
 
-        current_price = get_live_price(symbol)
+    for symbol in book.symbols():
+        current_price = prices.get(symbol)
 
         if current_price is None:
-            print(f"⚠️  {nse_symbol}: Unable to fetch price")
+            print(f"⚠️  {NSE_NAMES[symbol]}: Unable to fetch price")
             continue
 
-        target = alert['target_price']
-        condition = alert['condition']
-        action = alert['action']
+        show_status(symbol, current_price)
+
+        # Only the alerts this price crossed come out of the book; they are
+        # recorded as being sent before any order goes out
+        crossed = book.pop_crossed(symbol, current_price)
+        try:
+            state.begin(crossed, current_price)
+        except Exception as e:
+            # Nothing was sent: put them back and try again next cycle
+            for alert in crossed:
+                book.add(alert)
+            print(f"   ❌ Could not record triggers for {symbol}: {e}")
+            continue
+        for alert in crossed:
+            order_id = execute_alert(alert, current_price)
+            state.finish(alert, order_id)
+            if order_id:
+                alert['triggered'] = True
+            else:
+                book.add(alert)  # retry next cycle
 
-        status = "📉" if condition == "below" else "📈"
-        diff = current_price - target
-        diff_pct = (diff / target) * 100
+    state.flush()
 
-        print(f"{status} {nse_symbol}: ₹{current_price:.2f} → Target: ₹{target:.2f} | Diff: {diff_pct:+.1f}%")
 
-        # Check trigger
-        triggered = False
-        if condition == "below" and current_price <= target:
-            triggered = True
-        elif condition == "above" and current_price >= target:
-            triggered = True
-
-        if triggered:
-            print(f"   🚨 ALERT! {nse_symbol} hit ₹{current_price:.2f}")
-            order_id = place_order(nse_symbol, action, alert['quantity'])
-            if order_id:
-                alert['triggered'] = True
+def report_done():
+    """Final message once the book is empty (held-back alerts are not counted as triggered)"""
+    if held:
+        print(f"\n⏸️ No alerts left to monitor, but {len(held)} held back until released "
+              f"(--release). Bot stopping.")
+    else:
+        print("\n✅ All alerts triggered! Bot stopping.")
 
 
 # ========== MAIN LOOP ==========
 
+parser = argparse.ArgumentParser(description="Yahoo Finance price alert bot")
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument("--stream", action="store_true",
+                  help="react to Yahoo's live price stream instead of polling every 60 s")
+mode.add_argument("--replay", metavar="CSV", help="replay recorded ticks (timestamp,symbol,price)")
+mode.add_argument("--mock", action="store_true", help="random-walk ticks around the targets")
+parser.add_argument("--speed", type=float, default=1.0,
+                    help="replay speed multiplier (0 = as fast as possible)")
+parser.add_argument("--release", metavar="ID[=ORDER_ID]", nargs="+", default=[],
+                    help="settle alerts held back after a crash, once checked in the order book: "
+                         "ID re-arms the alert, ID=ORDER_ID records the order as placed")
+args = parser.parse_args()
+
+# Triggers and order ids survive restarts (replay / mock runs stay in memory)
+state = None if args.replay or args.mock else AlertState("yahoo_alert_state.sqlite3")
+if args.release and state is None:
+    parser.error("--release needs the saved state (not available with --replay / --mock)")
+held = []
+if state is not None:
+    for item in args.release:
+        alert_id, _, order_id = item.partition("=")
+        if state.release(alert_id, order_id or None):
+            print(f"🔓 {alert_id}: " + (f"recorded as placed (order {order_id})" if order_id else "re-armed"))
+        else:
+            print(f"⚠️  {alert_id}: not held back, nothing to release")
+    held = state.restore(ALERTS)
+    for alert in held:
+        print(f"⚠️  {alert['symbol']} {alert['action']} {alert['quantity']} [{alert['id']}]: order status "
+              f"unknown after a restart - held back; check the order book, then --release {alert['id']}[=ORDER_ID]")
+    done = sum(a['triggered'] for a in ALERTS) - len(held)
+    print(f"📂 Restored state: {done} of {len(ALERTS)} alerts already done, {len(held)} held back")
+
+# Untriggered alerts indexed by symbol and target price
+book = AlertBook(ALERTS)
+
 print("\n🤖 Enhanced Price Alert Bot v2.0")
 print("📊 Yahoo Finance FREE data | All 13 alerts active")
-print(f"📌 Monitoring: {len(ALERTS)} price targets")
+print(f"📌 Monitoring: {len(book)} price targets")
 print("⚠️  SIMULATION MODE: Safe testing, no real orders")
 print("Press Ctrl+C to stop\n")
 print("=" * 60)
 
-try:
-    check_count = 0
-    while True:
-        check_alerts()
-        check_count += 1
+if args.stream or args.replay or args.mock:
+    engine = tick_engine.TickEngine(book, execute_alert, state=state)
+    if args.stream:
+        feed = tick_engine.YahooStreamFeed(engine.symbols())
+    elif args.replay:
+        feed = tick_engine.ReplayFeed(args.replay, speed=args.speed)
+    else:
+        feed = tick_engine.MockFeed({a['symbol']: a['target_price'] for a in ALERTS})
+
+    try:
+        asyncio.run(engine.run(feed))
+        if engine.done():
+            report_done()
+        else:
+            print(f"\n⏹️ Feed ended after {engine.ticks} ticks")
+    except KeyboardInterrupt:
+        print(f"\n\n⛔ Bot stopped by user | Ticks processed: {engine.ticks}")
+        print("=" * 60)
+
+else:
+    try:
+        check_count = 0
+        while True:
+            check_alerts()
+            check_count += 1
+
+            if not book:
+                report_done()
+                break
 
-        if all(alert['triggered'] for alert in ALERTS):
-            print("\n✅ All alerts triggered! Bot stopping.")
-            break
+            print(f"\n💤 Next check in 60 seconds... (#{check_count})")
+            time.sleep(60)
 
-        print(f"\n💤 Next check in 60 seconds... (#{check_count})")
-        time.sleep(60)
+    except KeyboardInterrupt:
+        print(f"\n\n⛔ Bot stopped by user | Total checks: {check_count}")
+        print("=" * 60)
 
-except KeyboardInterrupt:
-    print(f"\n\n⛔ Bot stopped by user | Total checks: {check_count}")
-    print("=" * 60)
+if state is not None:
+    state.close()
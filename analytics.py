@@ -4,6 +4,12 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 
+import pond_aggregates
+import pond_analytics
+import pond_cache
+import pond_data
+import pond_images
+
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
     page_title="Pond Analytics Pro",
@@ -14,6 +20,7 @@ st.set_page_config(
 
 # --- 🟢 SETUP: IMAGE FOLDER ---
 IMG_DIR = "images"  # change if your folder name is different
+GALLERY_PAGE_SIZE = 12
 
 # --- 🎨 STYLING (Dark Mode Friendly) ---
 st.markdown("""
@@ -45,28 +52,40 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 📥 DATA LOADING ---
-DATA_PATH = "data/shape-filtering-final.xlsx"
+DATA_PATH = pond_data.DATA_PATH
 
 
 @st.cache_data
 def load_data():
-    if not os.path.exists(DATA_PATH):
-        return None
-    df = pd.read_excel(DATA_PATH, sheet_name=0)
-
-    rename_map = {
-        "Pond_ID": "PondID",
-        "Month_Year": "MonthYear",
-        "NDVI_Mean": "NDVIMean",
-        "VV_Mean": "VVMean"
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
+    # Parsed once into a columnar cache shared by all pond apps (see pond_data.py)
+    return pond_cache.load_dataset(DATA_PATH)
+
+
+@st.cache_data
+def load_aggregates():
+    # Per-pond totals; only months not yet in the persisted store are scanned
+    return pond_aggregates.sync_pond_aggregates(load_data(), source=DATA_PATH)
 
-    df["Date"] = pd.to_datetime(df["MonthYear"], format="%Y-%m", errors="coerce")
-    for c in ["NDVIMean", "VVMean"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-    return df
+
+@st.cache_data
+def load_pond_tables():
+    # Condition / ranking / risk tables, shared across app replicas (see pond_cache.py)
+    version = pond_data.data_version(DATA_PATH)
+    agg = load_aggregates()
+    return (
+        pond_cache.memoize("pond_summary", version, lambda: pond_analytics.classify_aggregates(agg)),
+        pond_cache.memoize("reliability_ranking", version, lambda: pond_analytics.reliability_ranking(agg)),
+        pond_cache.memoize("dryness_risk", version, lambda: pond_analytics.dryness_risk(agg)),
+    )
+
+
+@st.cache_data
+def load_month_buckets():
+    # KPIs, status distribution and trend per month; date filters sum buckets
+    version = pond_data.data_version(DATA_PATH)
+    return pond_cache.memoize(
+        "month_buckets", version, lambda: pond_analytics.build_month_buckets(load_data())
+    )
 
 
 df = load_data()
@@ -74,49 +93,26 @@ if df is None:
     st.error(f"❌ Critical Error: Data file not found at '{DATA_PATH}'. Please check the 'data' folder.")
     st.stop()
 
+# --- 🧠 POND-LEVEL TABLES ---
+# Rule-based condition (water/fallow ratios + NDVI), reliability ranking and
+# dryness risk, all computed from the per-pond aggregates
+pond_summary, ranking, risk_stats = load_pond_tables()
+
+# Per-month totals / status counts / pond presence for the date-filtered views
+month_buckets = load_month_buckets()
+
 # --- 🔍 SIDEBAR FILTERS ---
 st.sidebar.title("📊 Settings")
-years = sorted(df["Date"].dt.year.dropna().unique())
+years = sorted(month_buckets["months"].year.unique())
 selected_year = st.sidebar.selectbox("📅 Filter by Year", ["All"] + list(years))
 
+# The filter is a month range over the buckets; no rescan of the observations
 if selected_year != "All":
-    df_filtered = df[df["Date"].dt.year == selected_year]
+    period_start = pd.Timestamp(year=int(selected_year), month=1, day=1)
+    period_end = pd.Timestamp(year=int(selected_year), month=12, day=31)
 else:
-    df_filtered = df
-
-
-# --- 🧠 POND-LEVEL CONDITION CLASSIFICATION ---
-def classify_pond(group: pd.DataFrame) -> pd.Series:
-    total = len(group)
-    water = group["Status"].astype(str).str.contains("Water", case=False, na=False).sum()
-    fallow = group["Status"].astype(str).str.contains("Fallow", case=False, na=False).sum()
-
-    water_ratio = water / total if total > 0 else 0
-    fallow_ratio = fallow / total if total > 0 else 0
-    ndvi_mean = group["NDVIMean"].mean()
-
-    # Rule-based classification (you can tune thresholds later)
-    if water_ratio >= 0.7:
-        label = "Stable Water Pond"
-    elif 0.3 <= water_ratio < 0.7:
-        label = "Seasonal / Intermediate Pond"
-    elif fallow_ratio >= 0.7 and ndvi_mean is not None and ndvi_mean > 0.3:
-        label = "Not a Pond (Agriculture / Land)"
-    else:
-        label = "Uncertain / Needs Field Check"
+    period_start = period_end = None
 
-    return pd.Series({
-        "TotalMonths": total,
-        "WaterMonths": water,
-        "FallowMonths": fallow,
-        "WaterRatio": water_ratio,
-        "FallowRatio": fallow_ratio,
-        "NDVI_Mean": ndvi_mean,
-        "Condition": label
-    })
-
-
-pond_summary = df.groupby("PondID").apply(classify_pond).reset_index()
 
 # --- 🏠 MAIN DASHBOARD HEADER ---
 st.title("💧 Pond Water Monitoring Analytics")
@@ -124,10 +120,11 @@ st.markdown("### Executive Summary of Water Availability & Pond Health")
 st.markdown("---")
 
 # --- 1️⃣ KEY PERFORMANCE INDICATORS (KPIs) ---
-total_ponds = df_filtered["PondID"].nunique()
-total_records = len(df_filtered)
-water_count = df_filtered["Status"].astype(str).str.contains("Water", case=False, na=False).sum()
-fallow_count = df_filtered["Status"].astype(str).str.contains("Fallow", case=False, na=False).sum()
+kpis = pond_analytics.bucket_kpis(month_buckets, period_start, period_end)
+total_ponds = kpis["total_ponds"]
+total_records = kpis["total_records"]
+water_count = kpis["water_count"]
+fallow_count = kpis["fallow_count"]
 
 c1, c2, c3, c4 = st.columns(4)
 
@@ -159,33 +156,34 @@ fig_cond = px.bar(
     x="Condition",
     y="Count",
     color="Condition",
-    color_discrete_map={
-        "Stable Water Pond": "#2ecc71",
-        "Seasonal / Intermediate Pond": "#f1c40f",
-        "Not a Pond (Agriculture / Land)": "#e74c3c",
-        "Uncertain / Needs Field Check": "#95a5a6"
-    }
+    color_discrete_map=pond_analytics.CONDITION_COLORS
 )
 fig_cond.update_layout(xaxis_title="", yaxis_title="Number of Ponds")
 st.plotly_chart(fig_cond, use_container_width=True)
 
-# Condition table with filter
-st.markdown("#### 🔎 Pond-wise Condition Table")
-cond_filter = st.selectbox(
-    "Filter by condition",
-    ["All"] + cond_counts["Condition"].tolist()
-)
+# Condition table with filter. The filter only reruns this fragment, and each
+# filtered/sorted view is cached, so the big table does not re-sort per click.
+@st.cache_data
+def condition_view(condition):
+    summary = load_pond_tables()[0]
+    if condition != "All":
+        summary = summary[summary["Condition"] == condition]
+    return summary.sort_values("WaterRatio", ascending=False)
 
-if cond_filter != "All":
-    pond_view = pond_summary[pond_summary["Condition"] == cond_filter]
-else:
-    pond_view = pond_summary
 
-st.dataframe(
-    pond_view.sort_values("WaterRatio", ascending=False),
-    use_container_width=True,
-    height=400
-)
+@st.fragment
+def condition_table(conditions):
+    st.markdown("#### 🔎 Pond-wise Condition Table")
+    cond_filter = st.selectbox("Filter by condition", ["All"] + conditions)
+
+    st.dataframe(
+        condition_view(cond_filter),
+        use_container_width=True,
+        height=400
+    )
+
+
+condition_table(cond_counts["Condition"].tolist())
 
 st.markdown("---")
 
@@ -194,8 +192,7 @@ col_left, col_right = st.columns([1.2, 1.8])
 
 with col_left:
     st.subheader("📌 Status Distribution")
-    status_counts = df_filtered["Status"].value_counts().reset_index()
-    status_counts.columns = ["Status", "Count"]
+    status_counts = pond_analytics.bucket_status_counts(month_buckets, period_start, period_end)
 
     color_map = {
         "Water Present - High Confidence": "#004d99",
@@ -218,10 +215,7 @@ with col_left:
 
 with col_right:
     st.subheader("📈 Seasonal Water Trends")
-    df_filtered["MonthStr"] = df_filtered["Date"].dt.strftime("%Y-%m")
-
-    water_mask = df_filtered["Status"].astype(str).str.contains("Water", case=False, na=False)
-    trend = df_filtered[water_mask].groupby("MonthStr")["PondID"].nunique().reset_index()
+    trend = pond_analytics.bucket_water_trend(month_buckets, period_start, period_end)
 
     if not trend.empty:
         fig_trend = px.area(
@@ -248,10 +242,6 @@ with c_rank:
     st.subheader("🏆 Most Reliable Ponds")
     st.caption("Ponds that had water most frequently (scroll to see all).")
 
-    ranking = df.groupby("PondID")["Status"].apply(
-        lambda x: (x.astype(str).str.contains("Water", case=False, na=False).sum()) / len(x) * 100
-    ).sort_values(ascending=False).reset_index(name="Consistency")
-
     st.dataframe(
         ranking,
         column_config={
@@ -272,14 +262,6 @@ with c_risk:
     st.subheader("⚠️ High-Risk (Dry) Ponds")
     st.caption("Ponds that are frequently fallow/dry (scroll to see all).")
 
-    risk_stats = df.assign(
-        IsFallow=df["Status"].astype(str).str.contains("Fallow", case=False, na=False)
-    ).groupby("PondID").agg(
-        Total=("PondID", "size"),
-        Fallow=("IsFallow", "sum")
-    )
-    risk_stats["DryRatio"] = (risk_stats["Fallow"] / risk_stats["Total"]) * 100
-
     high_risk = risk_stats[risk_stats["DryRatio"] >= 50].sort_values("DryRatio", ascending=False)
 
     st.dataframe(
@@ -302,32 +284,47 @@ with c_risk:
 st.markdown("---")
 st.subheader("📸 Pond Image Gallery")
 
-if os.path.exists(IMG_DIR):
-    all_files = sorted([f for f in os.listdir(IMG_DIR) if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-
-    if all_files:
-        col_sel, col_view = st.columns([1, 3])
-
-        with col_sel:
-            st.markdown("**🔍 View Specific Pond**")
-            selected_file = st.selectbox("Select Image File", all_files)
+# Selecting an image or paging the grid only reruns this fragment
+@st.fragment
+def image_gallery():
+    if os.path.exists(IMG_DIR):
+        # Cached index (natural sort, rebuilt only when the folder changes)
+        all_files = pond_images.list_images(IMG_DIR)
+
+        if all_files:
+            col_sel, col_view = st.columns([1, 3])
+
+            with col_sel:
+                st.markdown("**🔍 View Specific Pond**")
+                selected_file = st.selectbox("Select Image File", all_files)
+
+            with col_view:
+                if selected_file:
+                    img_path = os.path.join(IMG_DIR, selected_file)
+                    st.image(img_path, caption=f"Displaying: {selected_file}", width=600)
+
+            # Grid shows cached thumbnails one page at a time; full-res only for the selection above
+            if st.toggle("📂 View All Images (Thumbnail Grid)"):
+                n_pages = max(1, -(-len(all_files) // GALLERY_PAGE_SIZE))
+                page = st.number_input(
+                    f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1
+                )
+                start = (page - 1) * GALLERY_PAGE_SIZE
+                page_files = all_files[start:start + GALLERY_PAGE_SIZE]
+                st.write(f"Found {len(all_files)} images. Showing {start + 1}-{start + len(page_files)}.")
+
+                cols = st.columns(4)
+                for idx, file_name in enumerate(page_files):
+                    img_path = os.path.join(IMG_DIR, file_name)
+                    with cols[idx % 4]:
+                        st.image(pond_images.thumbnail(img_path), caption=file_name, use_container_width=True)
+        else:
+            st.warning(f"No images found in '{IMG_DIR}'. Please check file extensions.")
+    else:
+        st.info("ℹ️ Image gallery hidden (image folder not found).")
 
-        with col_view:
-            if selected_file:
-                img_path = os.path.join(IMG_DIR, selected_file)
-                st.image(img_path, caption=f"Displaying: {selected_file}", width=600)
 
-        with st.expander("📂 Click to View All Images (Scrollable Grid)"):
-            st.write(f"Found {len(all_files)} images.")
-            cols = st.columns(4)
-            for idx, file_name in enumerate(all_files):
-                img_path = os.path.join(IMG_DIR, file_name)
-                with cols[idx % 4]:
-                    st.image(img_path, caption=file_name, use_container_width=True)
-    else:
-        st.warning(f"No images found in '{IMG_DIR}'. Please check file extensions.")
-else:
-    st.info("ℹ️ Image gallery hidden (image folder not found).")
+image_gallery()
 
 # --- 6️⃣ SMART INSIGHTS ---
 st.markdown("---")
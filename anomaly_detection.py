@@ -3,6 +3,10 @@ import streamlit as st
 import plotly.express as px
 import os
 
+import pond_anomaly
+import pond_cache
+import pond_data
+
 st.set_page_config(page_title="AI Anomaly Detection", layout="wide")
 st.title("🤖 AI Anomaly Detection (Statistical)")
 
@@ -12,17 +16,14 @@ DATA_PATH = "data/shape-filtering-final.xlsx"
 
 @st.cache_data
 def load_data():
-    if not os.path.exists(DATA_PATH): 
-        return None
-    df = pd.read_excel(DATA_PATH, sheet_name=0)
-    rename_map = {"Pond_ID": "PondID", "Month_Year": "MonthYear", "NDVI_Mean": "NDVIMean"}
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-    df["Date"] = pd.to_datetime(df["MonthYear"], format="%Y-%m", errors="coerce")
-    
-    # ✅ ADDED: Convert NDVI to numeric (prevents errors)
-    df["NDVIMean"] = pd.to_numeric(df["NDVIMean"], errors="coerce")
-    
-    return df
+    # Shared loader: renames columns and coerces NDVI to numeric once, at cache build time
+    return pond_cache.load_dataset(DATA_PATH)
+
+
+@st.cache_data
+def load_pond_index():
+    # PondID -> (start, stop) rows; the loaded frame is pond- and date-sorted
+    return pond_data.build_pond_index(load_data())
 
 
 df = load_data()
@@ -30,51 +31,48 @@ if df is None:
     st.error("❌ Data file not found. Make sure 'data/shape-filtering-final.xlsx' exists.")
     st.stop()
 
-# --- TYPE B: STATISTICAL ANOMALY DETECTION (Z-SCORE) ---
+# --- TYPE B: STATISTICAL ANOMALY DETECTION ---
+METHODS = {
+    "zscore": ("Z-Score vs pond average",
+               "Identifying data points that deviate significantly from the pond's historical average (Z-Score < -1.96)."),
+    "mad": ("Robust Z-Score (median / MAD)",
+            "Median/MAD based score: a few extreme months do not distort the baseline (modified Z < -3.5)."),
+    "seasonal": ("Seasonal baseline (same calendar month)",
+                 "Each month is compared with the same calendar month in other years, so normal monsoon swings are ignored."),
+    "ewma": ("EWMA Z-Score (recent months)",
+             "Each month is compared with an exponentially weighted average of the pond's earlier months."),
+    "rolling": ("Rolling Z-Score (last 12 months)",
+                "Each month is compared with the mean/std of the pond's previous 12 months."),
+    "multivariate": ("Multivariate (NDVI/NDWI/NDTI/VV/VH)",
+                     "Optical and SAR indices are scored together (per-pond Mahalanobis distance); "
+                     "'Driver' shows the index that deviated most."),
+}
+
+method = st.sidebar.selectbox(
+    "Detection method", list(METHODS), format_func=lambda m: METHODS[m][0]
+)
+
 st.header("1. Statistical Outlier Detection")
-st.info("Identifying data points that deviate significantly from the pond's historical average (Z-Score > 2).")
-
-anomalies = []
-
-# Analyze each pond individually
-for pond in df["PondID"].unique():
-    pond_data = df[df["PondID"] == pond].copy()
-
-    # Need at least 5 months of data to calculate stats
-    if len(pond_data) < 5:
-        continue
-
-    # ✅ FIXED: Drop NaN values before calculating statistics
-    pond_data = pond_data.dropna(subset=["NDVIMean"])
-    
-    if len(pond_data) < 5:  # Check again after dropping NaN
-        continue
-
-    # Calculate Statistics
-    mean_ndvi = pond_data["NDVIMean"].mean()
-    std_ndvi = pond_data["NDVIMean"].std()
-    
-    # ✅ FIXED: Prevent division by zero
-    if std_ndvi == 0 or pd.isna(std_ndvi):
-        continue
-
-    # Calculate Z-Score for every month
-    pond_data["Z_Score"] = (pond_data["NDVIMean"] - mean_ndvi) / std_ndvi
-
-    # Find Anomalies (Z-Score < -1.96 means unusually LOW water)
-    outliers = pond_data[pond_data["Z_Score"] < -1.96]
-
-    for _, row in outliers.iterrows():
-        anomalies.append({
-            "PondID": pond,
-            "Date": row["Date"],
-            "NDVI": round(row["NDVIMean"], 2),
-            "Average_NDVI": round(mean_ndvi, 2),
-            "Deviation_Score": round(row["Z_Score"], 2),
-            "Type": "Statistical Anomaly"
-        })
-
-anomaly_df = pd.DataFrame(anomalies)
+st.info(METHODS[method][1])
+
+
+@st.cache_data
+def find_anomalies(method="zscore", metric="NDVIMean"):
+    # All ponds scored in one vectorized pass (see pond_anomaly.DETECTORS);
+    # ponds with < 5 valid months or zero spread are skipped
+    # Shared across app replicas, keyed on the data version (see pond_cache.py)
+    return pond_cache.memoize(
+        "anomalies", pond_data.data_version(DATA_PATH),
+        lambda: pond_anomaly.detect_anomalies(load_data(), method, metric=metric),
+        method, metric,
+    )
+
+
+try:
+    anomaly_df = find_anomalies(method)
+except ValueError as e:  # e.g. multivariate on a workbook without SAR columns
+    st.error(f"❌ {e}")
+    st.stop()
 
 # --- VISUALIZATION ---
 
@@ -84,8 +82,11 @@ if not anomaly_df.empty:
     with col1:
         st.subheader("Detected Anomalies")
         st.write(f"Found **{len(anomaly_df)}** unusual events across all ponds.")
+        table_cols = ["PondID", "Date", "NDVI", "Deviation_Score"]
+        if "Driver" in anomaly_df.columns:
+            table_cols.append("Driver")
         st.dataframe(
-            anomaly_df[["PondID", "Date", "NDVI", "Deviation_Score"]],
+            anomaly_df[table_cols],
             use_container_width=True,
             height=400
         )
@@ -95,7 +96,7 @@ if not anomaly_df.empty:
         selected_pond = st.selectbox("Select Pond to Inspect", sorted(anomaly_df["PondID"].unique()))
 
         # Get data for that pond
-        chart_data = df[df["PondID"] == selected_pond].sort_values("Date")
+        chart_data = pond_data.pond_slice(df, load_pond_index(), selected_pond)
 
         # Plot
         fig = px.line(chart_data, x="Date", y="NDVIMean", title=f"Pond {selected_pond}: Normal vs Anomaly")
@@ -118,5 +119,16 @@ if not anomaly_df.empty:
         st.caption(
             "🔴 Red X marks months where water/vegetation was statistically much lower than normal for this pond.")
 
+        if method == "multivariate":
+            # Joint view: every index standardized per pond, anomalies as red lines
+            joint = pond_anomaly.joint_metrics(chart_data)
+            z = (chart_data[joint] - chart_data[joint].mean()) / chart_data[joint].std()
+            z.columns = [pond_anomaly.metric_label(c) for c in joint]
+            fig_joint = px.line(z.assign(Date=chart_data["Date"]), x="Date", y=list(z.columns),
+                                title=f"Pond {selected_pond}: All indices (standardized)")
+            for d in pond_anomalies["Date"]:
+                fig_joint.add_vline(x=d, line_color="red", line_dash="dot")
+            st.plotly_chart(fig_joint, use_container_width=True)
+
 else:
     st.success("✅ No statistical anomalies found in the dataset.")
@@ -0,0 +1,129 @@
+"""Benchmark: vectorized pond classification vs the old groupby().apply().
+
+Usage:
+    python benchmarks/bench_classify.py
+    python benchmarks/bench_classify.py --ponds 108 1000 10000 100000 --months 23
+
+The legacy per-pond ``apply`` is only timed up to ``--legacy-max`` ponds
+(it takes minutes beyond that); at every size where both run the outputs
+are checked for equality.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pond_analytics  # noqa: E402
+
+STATUSES = [
+    "Water Present - High Confidence",
+    "Water Present - Low Confidence",
+    "Fallow",
+    "Cant determine",
+]
+
+
+def synthetic_frame(n_ponds: int, n_months: int = 23, seed: int = 0) -> pd.DataFrame:
+    """Random frame with the normalized pond schema (PondID, Date, Status, NDVIMean)."""
+    rng = np.random.default_rng(seed)
+    n = n_ponds * n_months
+    # Per-pond water propensity so all four conditions show up
+    p_water = rng.uniform(0, 1, n_ponds).repeat(n_months)
+    draw = rng.uniform(0, 1, n)
+    status = np.where(
+        draw < p_water,
+        np.where(rng.uniform(0, 1, n) < 0.85, STATUSES[0], STATUSES[1]),
+        np.where(rng.uniform(0, 1, n) < 0.8, STATUSES[2], STATUSES[3]),
+    )
+    ndvi = rng.normal(0.25, 0.15, n)
+    ndvi[rng.uniform(0, 1, n) < 0.02] = np.nan
+    months = pd.date_range("2024-01-01", periods=n_months, freq="MS")
+    return pd.DataFrame({
+        "PondID": np.arange(1, n_ponds + 1).repeat(n_months),
+        "Date": np.tile(months.to_numpy(), n_ponds),
+        "Status": status,
+        "NDVIMean": ndvi,
+    })
+
+
+def legacy_classify_pond(group: pd.DataFrame) -> pd.Series:
+    """The original per-pond rule from analytics.py, kept as the reference."""
+    total = len(group)
+    water = group["Status"].astype(str).str.contains("Water", case=False, na=False).sum()
+    fallow = group["Status"].astype(str).str.contains("Fallow", case=False, na=False).sum()
+
+    water_ratio = water / total if total > 0 else 0
+    fallow_ratio = fallow / total if total > 0 else 0
+    ndvi_mean = group["NDVIMean"].mean()
+
+    if water_ratio >= 0.7:
+        label = "Stable Water Pond"
+    elif 0.3 <= water_ratio < 0.7:
+        label = "Seasonal / Intermediate Pond"
+    elif fallow_ratio >= 0.7 and ndvi_mean is not None and ndvi_mean > 0.3:
+        label = "Not a Pond (Agriculture / Land)"
+    else:
+        label = "Uncertain / Needs Field Check"
+
+    return pd.Series({
+        "TotalMonths": total,
+        "WaterMonths": water,
+        "FallowMonths": fallow,
+        "WaterRatio": water_ratio,
+        "FallowRatio": fallow_ratio,
+        "NDVI_Mean": ndvi_mean,
+        "Condition": label
+    })
+
+
+def legacy_classify(df: pd.DataFrame) -> pd.DataFrame:
+    return df.groupby("PondID")[["Status", "NDVIMean"]].apply(legacy_classify_pond).reset_index()
+
+
+def assert_same(new: pd.DataFrame, old: pd.DataFrame):
+    assert list(new.columns) == list(old.columns), (new.columns, old.columns)
+    assert (new["Condition"].to_numpy() == old["Condition"].to_numpy()).all()
+    for c in ["PondID", "TotalMonths", "WaterMonths", "FallowMonths",
+              "WaterRatio", "FallowRatio", "NDVI_Mean"]:
+        np.testing.assert_allclose(new[c].astype(float), old[c].astype(float), equal_nan=True)
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ponds", type=int, nargs="+", default=[108, 1_000, 10_000, 100_000])
+    parser.add_argument("--months", type=int, default=23)
+    parser.add_argument("--legacy-max", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'ponds':>8} {'rows':>10} {'vectorized':>12} {'legacy':>12} {'speedup':>8}")
+    for n_ponds in args.ponds:
+        df = synthetic_frame(n_ponds, args.months)
+        t_new = _best_of(lambda: pond_analytics.classify_ponds(df), args.repeat)
+
+        if n_ponds <= args.legacy_max:
+            assert_same(pond_analytics.classify_ponds(df), legacy_classify(df))
+            t_old = _best_of(lambda: legacy_classify(df), 1)
+            old_s, speedup = f"{t_old:10.3f} s", f"{t_old / t_new:7.0f}x"
+        else:
+            old_s, speedup = f"{'skipped':>12}", f"{'-':>8}"
+
+        print(f"{n_ponds:>8,} {len(df):>10,} {t_new:10.3f} s {old_s} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Benchmark: the pond analytics pipeline at growing data sizes.
+
+Generates synthetic workbooks with the ``shape-filtering-final.xlsx`` schema
+and times each stage the apps go through:
+
+    parse       read the raw sheet (streaming xlsx reader)
+    normalize   rename / coerce / encode status / sort by pond
+    cached      warm load from the Parquet cache (what a rerun pays)
+    classify    per-pond aggregates + condition classification
+    ranking     reliability ranking
+    risk        dryness risk
+    anomalies   every registered detector on NDVI
+    plots       condition/status/trend charts + one pond figure, to JSON
+
+Each stage reports the best wall time of ``--repeat`` runs and its peak
+traced memory (tracemalloc, measured in a separate run so tracing does not
+distort the timings). Results are compared against a stored baseline and the
+script exits with status 1 when a stage regresses beyond the tolerance.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --rows 100 10000 --repeat 5
+    python benchmarks/bench_pipeline.py --save-baseline   # after an intended change
+
+Workbooks are generated once and kept in ``data/.cache/bench``. Baselines are
+machine-specific: re-record them on the machine that runs the check.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pond_aggregates  # noqa: E402
+import pond_analytics  # noqa: E402
+import pond_anomaly  # noqa: E402
+import pond_data  # noqa: E402
+import pond_plots  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_pipeline.json")
+DATA_DIR = os.path.join(pond_data.CACHE_DIR, "bench")
+
+# A stage regresses when it is slower / bigger by more than the relative
+# tolerance AND by more than the absolute floor (keeps tiny stages from flapping)
+TIME_TOLERANCE = 0.5
+MEM_TOLERANCE = 0.25
+MIN_SECONDS = 0.05
+MIN_MB = 2.0
+
+STATUSES = [
+    "Water Present - High Confidence",
+    "Water Present - Low Confidence",
+    "Fallow",
+    "Cant determine",
+]
+REASONS = [
+    "Water Presence: Yes | Mean>0",
+    "Water Presence: Yes | Mean<=0",
+    "Water Presence: No | NDVI high",
+    "Insufficient clear observations",
+]
+PRESENCE = ["Yes", "Yes", "No", "Unknown"]
+HEADER = ["Pond_ID", "Month_Year", "Status", "Reason", "Monthly Water Presence",
+          "NDVI_Mean", "NDWI_Mean", "NDTI_Mean", "VV_Mean", "VH_Mean", "Shape_Score"]
+
+
+# --- SYNTHETIC WORKBOOKS ---
+def synthetic_rows(n_rows: int, n_months: int = 23, seed: int = 0) -> pd.DataFrame:
+    """Raw workbook rows (original column names) for ``n_rows`` pond-months."""
+    rng = np.random.default_rng(seed)
+    n_ponds = -(-n_rows // n_months)
+    n = n_ponds * n_months
+
+    # Per-pond water propensity so every condition shows up
+    p_water = rng.uniform(0, 1, n_ponds).repeat(n_months)
+    draw = rng.uniform(0, 1, n)
+    code = np.where(
+        draw < p_water,
+        np.where(rng.uniform(0, 1, n) < 0.85, 0, 1),
+        np.where(rng.uniform(0, 1, n) < 0.8, 2, 3),
+    )
+    months = pd.period_range("2024-01", periods=n_months, freq="M").strftime("%Y-%m")
+    wet = code < 2
+
+    def index(mean_wet, mean_dry, sd, missing=0.02):
+        values = np.where(wet, rng.normal(mean_wet, sd, n), rng.normal(mean_dry, sd, n)).round(4)
+        values[rng.uniform(0, 1, n) < missing] = np.nan
+        return values
+
+    rows = pd.DataFrame({
+        "Pond_ID": np.arange(1, n_ponds + 1).repeat(n_months),
+        "Month_Year": np.tile(np.asarray(months), n_ponds),
+        "Status": np.array(STATUSES)[code],
+        "Reason": np.array(REASONS)[code],
+        "Monthly Water Presence": np.array(PRESENCE)[code],
+        "NDVI_Mean": index(0.1, 0.35, 0.1),
+        "NDWI_Mean": index(0.1, -0.2, 0.1),
+        "NDTI_Mean": index(-0.18, 0.05, 0.05),
+        "VV_Mean": index(-23.0, -12.0, 2.0),
+        "VH_Mean": index(-33.0, -19.0, 2.0),
+        "Shape_Score": rng.uniform(0.5, 1.0, n_ponds).round(6).repeat(n_months),
+    })
+    return rows.iloc[:n_rows]
+
+
+def synthetic_workbook(n_rows: int, data_dir: str = DATA_DIR, seed: int = 0) -> str:
+    """Path of a synthetic workbook with ``n_rows`` rows, written on first use."""
+    path = os.path.join(data_dir, f"ponds-{n_rows}-s{seed}.xlsx")
+    if os.path.exists(path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    rows = synthetic_rows(n_rows, seed=seed)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(HEADER)
+    for row in rows.itertuples(index=False):
+        ws.append([None if isinstance(v, float) and v != v else v for v in row])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+# --- STAGES ---
+def plot_figures(summary: pd.DataFrame, buckets: dict, df: pd.DataFrame, pond_index: dict) -> int:
+    """Build the analytics charts and one pond figure; bytes sent to the browser."""
+    cond_counts = summary["Condition"].value_counts().reset_index()
+    cond_counts.columns = ["Condition", "Count"]
+    figs = [
+        px.bar(cond_counts, x="Condition", y="Count", color="Condition",
+               color_discrete_map=pond_analytics.CONDITION_COLORS),
+        px.pie(pond_analytics.bucket_status_counts(buckets), values="Count", names="Status", hole=0.5),
+        px.area(pond_analytics.bucket_water_trend(buckets), x="MonthStr", y="PondID", markers=True),
+    ]
+    pond_id = next(iter(pond_index))
+    figs.append(pond_plots.make_plot(pond_data.pond_slice(df, pond_index, pond_id), pond_id))
+    return sum(len(fig.to_json()) for fig in figs)
+
+
+def run_pipeline(path: str, cache_dir: str) -> dict:
+    """Stage name -> zero-argument callable, each fed by the previous stages."""
+    state = {}
+
+    def parse():
+        state["raw"] = pond_data.read_sheet(path, 0)
+
+    def normalize():
+        state["df"] = pond_data.normalize_pond_frame(state["raw"].copy())
+
+    def cached():
+        state["df"] = pond_data.load_pond_data(path, cache_dir=cache_dir)
+
+    def classify():
+        state["agg"] = pond_aggregates.build_pond_aggregates(state["df"])
+        state["summary"] = pond_analytics.classify_aggregates(state["agg"])
+
+    def ranking():
+        pond_analytics.reliability_ranking(state["agg"])
+
+    def risk():
+        pond_analytics.dryness_risk(state["agg"])
+
+    def anomalies():
+        for method in pond_anomaly.DETECTORS:
+            pond_anomaly.detect_anomalies(state["df"], method, metric="NDVIMean")
+
+    def plots():
+        df = state["df"]
+        plot_figures(state["summary"], pond_analytics.build_month_buckets(df),
+                     df, pond_data.build_pond_index(df))
+
+    pond_data.load_pond_data(path, cache_dir=cache_dir)  # fill the cache for "cached"
+    return {
+        "parse": parse, "normalize": normalize, "cached": cached, "classify": classify,
+        "ranking": ranking, "risk": risk, "anomalies": anomalies, "plots": plots,
+    }
+
+
+def measure(path: str, repeat: int) -> dict:
+    """``{stage: {"seconds": best wall time, "peak_mb": traced peak}}``."""
+    cache_dir = tempfile.mkdtemp(prefix="pond-bench-")
+    try:
+        stages = run_pipeline(path, cache_dir)
+        results = {}
+        for name, stage in stages.items():
+            best = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                stage()
+                best = min(best, time.perf_counter() - t0)
+
+            tracemalloc.start()
+            try:
+                stage()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            results[name] = {"seconds": round(best, 4), "peak_mb": round(peak / 2**20, 2)}
+        return results
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+# --- BASELINE ---
+def compare(results: dict, baseline: dict, time_tol: float, mem_tol: float) -> list:
+    """Regression messages for stages that got slower or bigger than the baseline."""
+    problems = []
+    for rows, stages in results.items():
+        for name, now in stages.items():
+            then = baseline.get(rows, {}).get(name)
+            if then is None:
+                continue
+            dt, dm = now["seconds"] - then["seconds"], now["peak_mb"] - then["peak_mb"]
+            if dt > MIN_SECONDS and now["seconds"] > then["seconds"] * (1 + time_tol):
+                problems.append(f"{name} @ {int(rows):,} rows: {then['seconds']:.3f} s -> {now['seconds']:.3f} s")
+            if dm > MIN_MB and now["peak_mb"] > then["peak_mb"] * (1 + mem_tol):
+                problems.append(f"{name} @ {int(rows):,} rows: {then['peak_mb']:.1f} MB -> {now['peak_mb']:.1f} MB")
+    return problems
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "pandas": pd.__version__,
+            "numpy": np.__version__, "machine": platform.machine(), "system": platform.system()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated workbooks are kept")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="record these results as the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--mem-tolerance", type=float, default=MEM_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for n_rows in args.rows:
+        t0 = time.perf_counter()
+        path = synthetic_workbook(n_rows, args.data_dir)
+        print(f"\n{n_rows:,} rows  ({os.path.getsize(path) / 2**20:.1f} MB workbook, "
+              f"ready in {time.perf_counter() - t0:.1f} s)")
+        print(f"{'stage':>10} {'wall':>10} {'peak':>10}")
+        results[str(n_rows)] = stages = measure(path, args.repeat)
+        for name, r in stages.items():
+            print(f"{name:>10} {r['seconds']:8.3f} s {r['peak_mb']:7.1f} MB")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["environment"] = environment()
+        baseline.setdefault("results", {}).update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print(f"\n⚠️ Baseline was recorded on {baseline.get('environment')}; timings may not compare.")
+
+    problems = compare(results, baseline.get("results", {}), args.time_tolerance, args.mem_tolerance)
+    if problems:
+        print("\n❌ Regressions against the baseline:")
+        for p in problems:
+            print(f"   {p}")
+        return 1
+    print("\n✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
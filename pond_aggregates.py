@@ -0,0 +1,195 @@
+"""Persisted per-pond aggregate store.
+
+Holds additive per-pond totals (observation counts, water/fallow months, NDVI
+sums and sums of squares, first/last dates). Ratios, means and z-score
+parameters are derived from it in O(ponds). When a new ``MonthYear`` batch
+arrives, only that batch is aggregated and merged into the store; the full
+history is not rescanned.
+
+A small JSON ledger next to the Parquet file records which months are
+already folded in, with each month's row count and a content hash, so the
+same batch is never counted twice and a corrected month (same rows, edited
+values) is never served from stale totals. Each source (workbook, directory
+or glob) has its own store, so switching between sources does not rebuild.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import pond_data
+
+AGG_COLS = [
+    "TotalMonths", "WaterMonths", "FallowMonths",
+    "NDVICount", "NDVISum", "NDVISumSq",
+    "FirstDate", "LastDate",
+]
+
+
+# --- BUILD / MERGE ---
+def build_pond_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate raw observations into one additive row per PondID."""
+    is_water, is_fallow = pond_data.status_flags(df)
+    ndvi = df["NDVIMean"]
+
+    return pd.DataFrame({
+        "PondID": df["PondID"],
+        "IsWater": is_water,
+        "IsFallow": is_fallow,
+        "NDVI": ndvi,
+        "NDVISq": ndvi * ndvi,
+        "Date": df["Date"],
+    }).groupby("PondID").agg(
+        TotalMonths=("IsWater", "size"),
+        WaterMonths=("IsWater", "sum"),
+        FallowMonths=("IsFallow", "sum"),
+        NDVICount=("NDVI", "count"),
+        NDVISum=("NDVI", "sum"),
+        NDVISumSq=("NDVISq", "sum"),
+        FirstDate=("Date", "min"),
+        LastDate=("Date", "max"),
+    )
+
+
+def merge_pond_aggregates(*aggs: pd.DataFrame) -> pd.DataFrame:
+    """Combine aggregate tables (e.g. stored history + a new month batch)."""
+    aggs = [a for a in aggs if a is not None and not a.empty]
+    if not aggs:
+        return pd.DataFrame(columns=AGG_COLS).rename_axis("PondID")
+    if len(aggs) == 1:
+        return aggs[0]
+    return pd.concat(aggs).groupby(level="PondID").agg({
+        "TotalMonths": "sum",
+        "WaterMonths": "sum",
+        "FallowMonths": "sum",
+        "NDVICount": "sum",
+        "NDVISum": "sum",
+        "NDVISumSq": "sum",
+        "FirstDate": "min",
+        "LastDate": "max",
+    })
+
+
+def pond_stats(agg: pd.DataFrame) -> pd.DataFrame:
+    """Derive ratios and NDVI mean/std (ddof=1) from the additive totals."""
+    out = agg.copy()
+    total = out["TotalMonths"].to_numpy(dtype=float)
+    out["WaterRatio"] = out["WaterMonths"] / total
+    out["FallowRatio"] = out["FallowMonths"] / total
+
+    n = out["NDVICount"].to_numpy(dtype=float)
+    s = out["NDVISum"].to_numpy(dtype=float)
+    ss = out["NDVISumSq"].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, s / n, np.nan)
+        var = np.where(n > 1, (ss - n * mean * mean) / (n - 1), np.nan)
+    out["NDVI_Mean"] = mean
+    out["NDVI_Std"] = np.sqrt(np.clip(var, 0, None))
+    return out
+
+
+# --- PERSISTENCE ---
+def store_path_for(source: str = pond_data.DATA_PATH, cache_dir: str = pond_data.CACHE_DIR) -> str:
+    """Aggregate store for ``source``, named like its ``pond_data`` manifest (stem + path hash)."""
+    return os.path.splitext(pond_data._manifest_path(source, cache_dir))[0] + ".aggregates.parquet"
+
+
+def _ledger_path(store_path: str) -> str:
+    return os.path.splitext(store_path)[0] + ".months.json"
+
+
+def load_store(store_path: str):
+    """Return ``(aggregates, month_ledger)``; empty if nothing is stored yet."""
+    try:
+        agg = pd.read_parquet(store_path)
+        with open(_ledger_path(store_path), "r", encoding="utf-8") as f:
+            ledger = json.load(f)
+    except (OSError, ValueError):
+        return merge_pond_aggregates(), {}
+
+    # The two files are written separately; if they disagree (e.g. a crash
+    # between writes) start over rather than risk double counting a month.
+    if not all(isinstance(v, dict) for v in ledger.values()):
+        return merge_pond_aggregates(), {}  # ledger from before month hashes
+    if int(agg["TotalMonths"].sum()) != sum(v["rows"] for v in ledger.values()):
+        return merge_pond_aggregates(), {}
+    return agg.set_index("PondID"), ledger
+
+
+def save_store(agg: pd.DataFrame, ledger: dict, store_path: str):
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+    if pond_data._write_parquet(agg.reset_index(), store_path):
+        pond_data._atomic_write_json(_ledger_path(store_path), ledger)
+
+
+def _month_keys(df: pd.DataFrame) -> pd.Series:
+    return df["MonthYear"].fillna("").astype(str)
+
+
+# Columns the aggregates are computed from; a change in any of them changes the month hash
+HASH_COLS = ["PondID", "StatusCode", "NDVIMean", "Date"]
+
+
+def _month_ledger(df: pd.DataFrame) -> dict:
+    """``{month: {"rows": n, "hash": h}}``; ``h`` is an order-independent content hash."""
+    cols = [c for c in HASH_COLS if c in df.columns]
+    if "StatusCode" not in df.columns:
+        cols.append("Status")
+    row_hash = pd.util.hash_pandas_object(df[cols], index=False)
+    grouped = pd.DataFrame({
+        "Month": _month_keys(df).to_numpy(),
+        "Hash": row_hash.to_numpy(),
+    }).groupby("Month")["Hash"]
+    rows = grouped.size()
+    hashes = grouped.sum()  # uint64 sum wraps, so row order does not matter
+    return {str(m): {"rows": int(rows[m]), "hash": f"{int(hashes[m]):016x}"} for m in rows.index}
+
+
+def append_month_batch(batch: pd.DataFrame, store_path: str = None,
+                       source: str = pond_data.DATA_PATH) -> pd.DataFrame:
+    """Fold a new monthly batch into the persisted store of ``source``.
+
+    Raises ``ValueError`` if any month in ``batch`` is already in the store.
+    """
+    store_path = store_path or store_path_for(source)
+    agg, ledger = load_store(store_path)
+
+    batch_ledger = _month_ledger(batch)
+    already = sorted(set(batch_ledger) & set(ledger))
+    if already:
+        raise ValueError(f"Months already aggregated: {', '.join(already)}")
+
+    agg = merge_pond_aggregates(agg, build_pond_aggregates(batch))
+    ledger.update(batch_ledger)
+    save_store(agg, ledger, store_path)
+    return agg
+
+
+def sync_pond_aggregates(df: pd.DataFrame, store_path: str = None,
+                         source: str = pond_data.DATA_PATH) -> pd.DataFrame:
+    """Bring the store of ``source`` (``df``'s origin) up to date and return the aggregates.
+
+    Months not yet in the ledger are aggregated and merged. If a stored month
+    disappeared or its content changed (row count or hash), the store is
+    rebuilt from ``df``.
+    """
+    store_path = store_path or store_path_for(source)
+    agg, ledger = load_store(store_path)
+
+    current = _month_ledger(df)
+    if any(current.get(m) != entry for m, entry in ledger.items()):
+        agg, ledger = merge_pond_aggregates(), {}
+
+    new_months = [m for m in current if m not in ledger]
+    if not new_months:
+        return agg
+
+    if ledger:
+        batch = df[_month_keys(df).isin(new_months)]
+    else:
+        batch = df
+    agg = merge_pond_aggregates(agg, build_pond_aggregates(batch))
+    ledger.update({m: current[m] for m in new_months})
+    save_store(agg, ledger, store_path)
+    return agg
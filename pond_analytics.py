@@ -0,0 +1,217 @@
+"""Pond-level analytics shared by the dashboards.
+
+Pond-level results are derived from the additive per-pond table in
+``pond_aggregates`` (built from the IsWater/IsFallow flags, not Status
+strings), so they cost O(ponds) once the aggregates exist.
+"""
+import numpy as np
+import pandas as pd
+
+import pond_aggregates
+import pond_data
+
+# --- CONDITION LABELS ---
+STABLE_WATER = "Stable Water Pond"
+SEASONAL = "Seasonal / Intermediate Pond"
+NOT_A_POND = "Not a Pond (Agriculture / Land)"
+UNCERTAIN = "Uncertain / Needs Field Check"
+
+CONDITION_COLORS = {
+    STABLE_WATER: "#2ecc71",
+    SEASONAL: "#f1c40f",
+    NOT_A_POND: "#e74c3c",
+    UNCERTAIN: "#95a5a6",
+}
+
+
+# --- 🧠 POND-LEVEL CONDITION CLASSIFICATION ---
+def classify_ponds(df: pd.DataFrame, **thresholds) -> pd.DataFrame:
+    """Classify every pond in the raw observation frame ``df``.
+
+    Shortcut for ``classify_aggregates(build_pond_aggregates(df))``.
+    """
+    return classify_aggregates(pond_aggregates.build_pond_aggregates(df), **thresholds)
+
+
+def classify_aggregates(
+    agg: pd.DataFrame,
+    stable_ratio: float = 0.7,
+    seasonal_ratio: float = 0.3,
+    fallow_ratio: float = 0.7,
+    ndvi_threshold: float = 0.3,
+) -> pd.DataFrame:
+    """Classify ponds from the per-pond aggregate table (O(ponds)).
+
+    Rules (first match wins):
+
+    * water ratio >= ``stable_ratio`` -> Stable Water Pond
+    * ``seasonal_ratio`` <= water ratio < ``stable_ratio`` -> Seasonal
+    * fallow ratio >= ``fallow_ratio`` and mean NDVI > ``ndvi_threshold``
+      -> Not a Pond (Agriculture / Land)
+    * otherwise -> Uncertain / Needs Field Check
+
+    Returns one row per PondID with TotalMonths, WaterMonths, FallowMonths,
+    WaterRatio, FallowRatio, NDVI_Mean and Condition.
+    """
+    summary = pond_aggregates.pond_stats(agg)
+
+    water_ratio = summary["WaterRatio"].to_numpy()
+    summary["Condition"] = np.select(
+        [
+            water_ratio >= stable_ratio,
+            (water_ratio >= seasonal_ratio) & (water_ratio < stable_ratio),
+            (summary["FallowRatio"].to_numpy() >= fallow_ratio)
+            & (summary["NDVI_Mean"].to_numpy() > ndvi_threshold),
+        ],
+        [STABLE_WATER, SEASONAL, NOT_A_POND],
+        default=UNCERTAIN,
+    )
+
+    return summary[
+        ["TotalMonths", "WaterMonths", "FallowMonths",
+         "WaterRatio", "FallowRatio", "NDVI_Mean", "Condition"]
+    ].reset_index()
+
+
+# --- 🏆 RELIABILITY & RISK ---
+def reliability_ranking(agg: pd.DataFrame) -> pd.DataFrame:
+    """PondID + Consistency (% of months with water), most reliable first."""
+    consistency = agg["WaterMonths"] / agg["TotalMonths"] * 100
+    return consistency.sort_values(ascending=False).reset_index(name="Consistency")
+
+
+def dryness_risk(agg: pd.DataFrame) -> pd.DataFrame:
+    """Total / Fallow month counts and DryRatio (%) per PondID."""
+    risk = pd.DataFrame({
+        "Total": agg["TotalMonths"],
+        "Fallow": agg["FallowMonths"],
+    })
+    risk["DryRatio"] = (risk["Fallow"] / risk["Total"]) * 100
+    return risk
+
+
+# --- 📅 MONTH BUCKETS (DATE FILTER PUSHDOWN) ---
+# Bits set in each byte value, for counting ponds in packed presence rows
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+BUCKET_COLS = ["Records", "Water", "Fallow"]
+
+
+def build_month_buckets(df: pd.DataFrame) -> dict:
+    """Pre-aggregate observations per calendar month for date-filtered views.
+
+    Returns a dict with:
+
+    * ``months``: sorted month starts (``DatetimeIndex``)
+    * ``prefix``: prefix sums of Records / Water / Fallow and per-status
+      counts, so any month range is ``prefix[b] - prefix[a]``
+    * ``undated``: the same counts for rows without a Date (only in "All")
+    * ``statuses``: status labels matching the count columns
+    * ``ponds`` / ``water_ponds``: month x pond presence bitsets (last row:
+      undated), for distinct-pond counts over a range
+    * ``water_pond_counts``: ponds with water per month (the trend)
+
+    Filtering then costs O(months x ponds / 8) at most, independent of the
+    number of observations.
+    """
+    dates = df["Date"]
+    dated = dates.notna().to_numpy()
+    month_start = dates.dt.to_period("M").dt.to_timestamp()
+    months = pd.DatetimeIndex(np.unique(month_start[dated].to_numpy()))
+    n_months = len(months)
+
+    # Bucket per row; undated rows go to the extra last bucket
+    bucket = np.full(len(df), n_months, dtype=np.int64)
+    bucket[dated] = months.searchsorted(month_start[dated])
+    n_buckets = n_months + 1
+
+    is_water, is_fallow = (np.asarray(f, dtype=bool) for f in pond_data.status_flags(df))
+    status_codes, statuses = pd.factorize(df["Status"])
+    has_status = status_codes >= 0
+    n_status = len(statuses)
+
+    counts = np.column_stack([
+        np.bincount(bucket, minlength=n_buckets),
+        np.bincount(bucket, weights=is_water, minlength=n_buckets),
+        np.bincount(bucket, weights=is_fallow, minlength=n_buckets),
+        np.bincount(
+            bucket[has_status] * n_status + status_codes[has_status],
+            minlength=n_buckets * n_status,
+        ).reshape(n_buckets, n_status),
+    ]).astype(np.int64)
+
+    pond_codes, _ = pd.factorize(df["PondID"])
+    has_pond = pond_codes >= 0
+    n_ponds = int(pond_codes.max()) + 1 if has_pond.any() else 0
+
+    def presence(mask):
+        grid = np.zeros((n_buckets, n_ponds), dtype=bool)
+        grid[bucket[mask], pond_codes[mask]] = True
+        return grid
+
+    water_grid = presence(has_pond & is_water)
+    prefix = np.zeros((n_months + 1, counts.shape[1]), dtype=np.int64)
+    np.cumsum(counts[:n_months], axis=0, out=prefix[1:])
+
+    return {
+        "months": months,
+        "prefix": prefix,
+        "undated": counts[n_months],
+        "statuses": [str(s) for s in statuses],
+        "ponds": np.packbits(presence(has_pond), axis=1),
+        "water_ponds": np.packbits(water_grid, axis=1),
+        "water_pond_counts": water_grid[:n_months].sum(axis=1),
+    }
+
+
+def _bucket_range(buckets: dict, start=None, end=None):
+    """``(a, b, include_undated)`` for months in ``[start, end]`` (inclusive)."""
+    months = buckets["months"]
+    a = 0 if start is None else months.searchsorted(pd.Timestamp(start).to_period("M").to_timestamp())
+    b = len(months) if end is None else months.searchsorted(pd.Timestamp(end), side="right")
+    return int(a), int(max(a, b)), start is None and end is None
+
+
+def _range_counts(buckets: dict, start=None, end=None) -> np.ndarray:
+    a, b, undated = _bucket_range(buckets, start, end)
+    counts = buckets["prefix"][b] - buckets["prefix"][a]
+    return counts + buckets["undated"] if undated else counts
+
+
+def _distinct_ponds(bitsets: np.ndarray, buckets: dict, start=None, end=None) -> int:
+    a, b, undated = _bucket_range(buckets, start, end)
+    rows = bitsets[a:b] if not undated else np.vstack([bitsets[a:b], bitsets[-1:]])
+    if len(rows) == 0:
+        return 0
+    return int(_POPCOUNT[np.bitwise_or.reduce(rows, axis=0)].sum())
+
+
+def bucket_kpis(buckets: dict, start=None, end=None) -> dict:
+    """Total ponds / observations / water months / fallow months in the range."""
+    records, water, fallow = _range_counts(buckets, start, end)[:3]
+    return {
+        "total_ponds": _distinct_ponds(buckets["ponds"], buckets, start, end),
+        "total_records": int(records),
+        "water_count": int(water),
+        "fallow_count": int(fallow),
+    }
+
+
+def bucket_status_counts(buckets: dict, start=None, end=None) -> pd.DataFrame:
+    """Status / Count in the range, most frequent first (like ``value_counts``)."""
+    counts = _range_counts(buckets, start, end)[len(BUCKET_COLS):]
+    out = pd.DataFrame({"Status": buckets["statuses"], "Count": counts})
+    out = out[out["Count"] > 0]
+    return out.sort_values("Count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def bucket_water_trend(buckets: dict, start=None, end=None) -> pd.DataFrame:
+    """MonthStr / PondID (ponds with water) for months in the range that had water."""
+    a, b, _ = _bucket_range(buckets, start, end)
+    counts = buckets["water_pond_counts"][a:b]
+    months = buckets["months"][a:b]
+    keep = counts > 0
+    return pd.DataFrame({
+        "MonthStr": months[keep].strftime("%Y-%m"),
+        "PondID": counts[keep],
+    })
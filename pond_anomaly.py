@@ -0,0 +1,340 @@
+"""Anomaly detection over all ponds at once.
+
+Per-pond statistics are broadcast back to the observations with
+``groupby().transform`` so every pond is scored in a single vectorized pass.
+The output has one row per flagged observation:
+
+    PondID, Date, <label>, Average_<label>, Deviation_Score, Type
+
+where ``<label>`` is the short metric name (``NDVI`` for ``NDVIMean``).
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+METRIC_LABELS = {
+    "NDVIMean": "NDVI",
+    "NDWIMean": "NDWI",
+    "NDTIMean": "NDTI",
+    "VVMean": "VV",
+    "VHMean": "VH",
+}
+
+
+def metric_label(metric: str) -> str:
+    return METRIC_LABELS.get(metric, metric)
+
+
+def _flag(score: pd.Series, threshold: float) -> pd.Series:
+    """Negative thresholds flag unusually low values, positive ones high values."""
+    return score < threshold if threshold < 0 else score > threshold
+
+
+def _anomaly_frame(df, mask, metric, baseline, score, kind, extra=None) -> pd.DataFrame:
+    """Assemble the shared anomaly schema for the rows selected by ``mask``.
+
+    ``extra`` maps additional column names to full-length arrays.
+    """
+    label = metric_label(metric)
+    mask = np.asarray(mask, dtype=bool)
+
+    # Ponds in order of first appearance, observations in frame order
+    pond_codes = pd.factorize(df["PondID"])[0][mask]
+    order = np.argsort(pond_codes, kind="stable")
+
+    def pick(values):
+        return np.asarray(values)[mask][order]
+
+    out = pd.DataFrame({
+        "PondID": pick(df["PondID"]),
+        "Date": pick(df["Date"]),
+        label: np.round(pick(df[metric]).astype(float), 2),
+        f"Average_{label}": np.round(pick(baseline).astype(float), 2),
+        "Deviation_Score": np.round(pick(score).astype(float), 2),
+        "Type": kind,
+    })
+    for name, values in (extra or {}).items():
+        out[name] = pick(values)
+    return out
+
+
+# --- Z-SCORE (PER-POND HISTORICAL AVERAGE) ---
+def zscore_anomalies(
+    df: pd.DataFrame,
+    metric: str = "NDVIMean",
+    threshold: float = -1.96,
+    min_obs: int = 5,
+) -> pd.DataFrame:
+    """Flag observations whose per-pond z-score crosses ``threshold``.
+
+    Ponds with fewer than ``min_obs`` valid values, or with zero spread, are
+    skipped (same rules as the original per-pond loop).
+    """
+    values = df[metric]
+    grouped = values.groupby(df["PondID"])
+    count = grouped.transform("count")
+    mean = grouped.transform("mean")
+    std = grouped.transform("std")
+
+    z = (values - mean) / std
+    valid = (count >= min_obs) & (std > 0) & z.notna()
+    return _anomaly_frame(df, valid & _flag(z, threshold), metric, mean, z,
+                          "Statistical Anomaly")
+
+
+# --- ROBUST Z-SCORE (MEDIAN / MAD) ---
+def mad_anomalies(
+    df: pd.DataFrame,
+    metric: str = "NDVIMean",
+    threshold: float = -3.5,
+    min_obs: int = 5,
+) -> pd.DataFrame:
+    """Modified z-score ``0.6745 * (x - median) / MAD`` per pond.
+
+    Median and MAD are not dragged around by the outliers themselves, so a
+    single bad month does not hide the next one. ``-3.5`` is the usual cutoff.
+    """
+    values = df[metric]
+    pond = df["PondID"]
+    grouped = values.groupby(pond)
+    count = grouped.transform("count")
+    median = grouped.transform("median")
+    mad = (values - median).abs().groupby(pond).transform("median")
+
+    z = 0.6745 * (values - median) / mad
+    valid = (count >= min_obs) & (mad > 0) & z.notna()
+    return _anomaly_frame(df, valid & _flag(z, threshold), metric, median, z,
+                          "Robust (MAD) Anomaly")
+
+
+# --- SEASONAL BASELINE (SAME CALENDAR MONTH) ---
+def seasonal_anomalies(
+    df: pd.DataFrame,
+    metric: str = "NDVIMean",
+    threshold: float = -1.96,
+    min_obs: int = 5,
+    min_years: int = 2,
+) -> pd.DataFrame:
+    """Score each month against the pond's mean for that calendar month.
+
+    Residuals from the seasonal baseline are scaled by the pond's residual
+    std, so normal monsoon swings are not reported. Calendar months seen in
+    fewer than ``min_years`` years have no baseline and are not scored.
+    """
+    values = df[metric]
+    pond = df["PondID"]
+    month = df["Date"].dt.month
+
+    seasonal = values.groupby([pond, month])
+    season_count = seasonal.transform("count")
+    baseline = seasonal.transform("mean")
+
+    residual = (values - baseline).where(season_count >= min_years)
+    res_grouped = residual.groupby(pond)
+    res_count = res_grouped.transform("count")
+    res_std = res_grouped.transform("std")
+
+    z = residual / res_std
+    valid = (res_count >= min_obs) & (res_std > 0) & z.notna()
+    return _anomaly_frame(df, valid & _flag(z, threshold), metric, baseline, z,
+                          "Seasonal Anomaly")
+
+
+# --- TRAILING (EWMA / ROLLING) Z-SCORE ---
+def _trailing_zscore(df, metric, window):
+    """Z-score of each observation against its pond's *previous* observations.
+
+    ``window`` maps a ``SeriesGroupBy`` to a window object (``.ewm(...)`` or
+    ``.rolling(...)``); pandas evaluates it for all ponds in one call.
+    """
+    # Rows without a PondID have no history to compare against and are not scored
+    known = np.flatnonzero(df["PondID"].notna().to_numpy())
+    pond_ids = df["PondID"].to_numpy()
+    order = known[np.lexsort((df["Date"].to_numpy()[known], pond_ids[known]))]
+    values = pd.Series(df[metric].to_numpy()[order])
+    pond = pd.Series(pond_ids[order])
+
+    win = window(values.groupby(pond))
+    mean = win.mean().droplevel(0).sort_index()
+    std = win.std().droplevel(0).sort_index()
+
+    # Stats up to the previous observation, so a month is not its own baseline
+    mean = mean.groupby(pond).shift()
+    std = std.groupby(pond).shift()
+    z = (values - mean) / std
+    valid = std.gt(0) & z.notna()
+
+    def unsort(s, fill=np.nan, dtype=float):
+        out = np.full(len(df), fill, dtype=dtype)
+        out[order] = s.to_numpy(dtype=dtype)
+        return out
+
+    return unsort(mean), unsort(z), unsort(valid, False, bool)
+
+
+def ewma_anomalies(
+    df: pd.DataFrame,
+    metric: str = "NDVIMean",
+    threshold: float = -1.96,
+    min_obs: int = 5,
+    span: int = 6,
+) -> pd.DataFrame:
+    """Z-score against an exponentially weighted mean/std of earlier months."""
+    baseline, z, valid = _trailing_zscore(
+        df, metric, lambda g: g.ewm(span=span, min_periods=min_obs))
+    return _anomaly_frame(df, valid & _flag(z, threshold), metric, baseline, z,
+                          "EWMA Anomaly")
+
+
+def rolling_anomalies(
+    df: pd.DataFrame,
+    metric: str = "NDVIMean",
+    threshold: float = -1.96,
+    min_obs: int = 5,
+    window: int = 12,
+) -> pd.DataFrame:
+    """Z-score against the mean/std of the previous ``window`` months."""
+    baseline, z, valid = _trailing_zscore(
+        df, metric, lambda g: g.rolling(window, min_periods=min_obs))
+    return _anomaly_frame(df, valid & _flag(z, threshold), metric, baseline, z,
+                          "Rolling Anomaly")
+
+
+# --- MULTIVARIATE (MAHALANOBIS DISTANCE ACROSS METRICS) ---
+# ShapeScore is constant per pond, so it carries no month-to-month signal
+JOINT_METRICS = ["NDVIMean", "NDWIMean", "NDTIMean", "VVMean", "VHMean"]
+
+
+def joint_metrics(df: pd.DataFrame, metrics=None) -> list:
+    """The ``metrics`` (default ``JOINT_METRICS``) that ``df`` actually has."""
+    return [m for m in (metrics or JOINT_METRICS) if m in df.columns]
+
+
+def _chi2_quantile(q: float, dof: int) -> float:
+    """Wilson-Hilferty approximation of the chi-square quantile (no SciPy)."""
+    z = NormalDist().inv_cdf(q)
+    c = 2.0 / (9.0 * dof)
+    return dof * (1.0 - c + z * np.sqrt(c)) ** 3
+
+
+def _group_sums(codes, weights, n_groups):
+    return np.bincount(codes, weights=weights, minlength=n_groups)
+
+
+def mahalanobis_anomalies(
+    df: pd.DataFrame,
+    metric: str = "NDVIMean",
+    threshold: float = None,
+    min_obs: int = 10,
+    metrics=None,
+    quantile: float = 0.975,
+) -> pd.DataFrame:
+    """Joint optical + SAR score: per-pond Mahalanobis distance over ``metrics``.
+
+    Every pond gets its own mean vector and covariance matrix, computed for
+    all ponds at once with ``bincount`` reductions; the covariances are
+    pseudo-inverted as one stacked ``(ponds, k, k)`` array. Months missing any
+    metric are not scored. ``threshold`` defaults to the distance matching
+    the chi-square ``quantile`` for ``k`` degrees of freedom (conservative
+    for short series, where in-sample distances are bounded).
+
+    ``metric`` only picks the value/average reported in the output schema;
+    the extra ``Driver`` column names the metric that deviated most. Metrics
+    missing from ``df`` (e.g. no SAR columns) are left out; fewer than two
+    remaining raises ``ValueError``.
+    """
+    wanted = list(metrics or JOINT_METRICS)
+    metrics = joint_metrics(df, wanted)
+    if len(metrics) < 2:
+        raise ValueError(
+            "Multivariate detection needs at least two of "
+            f"{', '.join(metric_label(m) for m in wanted)}; this data has "
+            f"{', '.join(metric_label(m) for m in metrics) or 'none'}"
+        )
+    k = len(metrics)
+    if threshold is None:
+        threshold = float(np.sqrt(_chi2_quantile(quantile, k)))
+    min_obs = max(min_obs, k + 2)
+
+    X = df[metrics].to_numpy(dtype=float)
+    codes_all, uniques = pd.factorize(df["PondID"])
+    # Months missing a metric, and rows without a PondID, are not scored
+    complete = ~np.isnan(X).any(axis=1) & (codes_all >= 0)
+    n_ponds = len(uniques)
+    codes = codes_all[complete]
+    Xc = X[complete]
+
+    # Per-pond mean vectors -> centered observations
+    n = _group_sums(codes, None, n_ponds)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.column_stack(
+            [_group_sums(codes, Xc[:, j], n_ponds) for j in range(k)]
+        ) / n[:, None]
+    D = Xc - mean[codes]
+
+    # Per-pond covariance matrices (upper triangle, mirrored)
+    cov = np.zeros((n_ponds, k, k))
+    for a in range(k):
+        for b in range(a, k):
+            cov[:, a, b] = cov[:, b, a] = _group_sums(codes, D[:, a] * D[:, b], n_ponds)
+    enough = n >= min_obs
+    cov[enough] /= (n[enough] - 1)[:, None, None]
+    inv = np.zeros_like(cov)
+    if enough.any():
+        inv[enough] = np.linalg.pinv(cov[enough], hermitian=True)
+
+    # d^2 = D^T S^-1 D for every observation, without materializing (n, k, k)
+    d2 = np.zeros(len(D))
+    for a in range(k):
+        for b in range(k):
+            d2 += D[:, a] * inv[codes, a, b] * D[:, b]
+    distance = np.sqrt(np.clip(d2, 0, None))
+
+    # Metric with the largest standardized deviation
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sd = np.sqrt(np.einsum("pii->pi", cov))[codes]
+        driver_idx = np.nanargmax(np.where(sd > 0, np.abs(D) / sd, 0.0), axis=1)
+
+    score = np.full(len(df), np.nan)
+    score[complete] = distance
+    valid = np.zeros(len(df), dtype=bool)
+    valid[complete] = enough[codes]
+    driver = np.full(len(df), None, dtype=object)
+    driver[complete] = np.array([metric_label(m) for m in metrics], dtype=object)[driver_idx]
+
+    col = metrics.index(metric) if metric in metrics else None
+    if col is not None:
+        baseline = np.full(len(df), np.nan)
+        baseline[complete] = mean[codes, col]
+    else:
+        baseline = df[metric].groupby(df["PondID"]).transform("mean")
+
+    with np.errstate(invalid="ignore"):
+        mask = valid & (score > threshold)
+    return _anomaly_frame(df, mask, metric, baseline, score,
+                          "Multivariate Anomaly", extra={"Driver": driver})
+
+
+# --- STRATEGY REGISTRY ---
+# name -> detector(df, metric=..., threshold=..., min_obs=..., **extra);
+# add an entry here to make a new strategy available to the apps.
+DETECTORS = {
+    "zscore": zscore_anomalies,
+    "mad": mad_anomalies,
+    "seasonal": seasonal_anomalies,
+    "ewma": ewma_anomalies,
+    "rolling": rolling_anomalies,
+    "multivariate": mahalanobis_anomalies,
+}
+
+
+def detect_anomalies(df: pd.DataFrame, method: str = "zscore", **params) -> pd.DataFrame:
+    """Run the detector registered as ``method`` with its keyword ``params``."""
+    try:
+        detector = DETECTORS[method]
+    except KeyError:
+        raise ValueError(
+            f"Unknown anomaly method '{method}'. Choose from: {', '.join(DETECTORS)}"
+        ) from None
+    return detector(df, **params)
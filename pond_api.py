@@ -0,0 +1,335 @@
+"""Headless JSON API over the pond analytics (no Streamlit session needed).
+
+Serves the same tables as the dashboards -- condition classification,
+reliability ranking, dryness risk, anomalies, KPIs, status distribution and
+the water trend -- from the ``pond_*`` modules, for GIS and reporting tools.
+
+    python pond_api.py --port 8080
+    curl "localhost:8080/ponds?condition=Seasonal%20/%20Intermediate%20Pond&page=2"
+    curl "localhost:8080/anomalies?method=seasonal&metric=NDWIMean"
+    curl "localhost:8080/kpis?start=2024-06&end=2025-05"
+
+Endpoints (all GET, JSON):
+
+    /health                     data version and row counts
+    /ponds                      condition table (?condition=, paginated)
+    /ponds/{id}                 one pond: condition, consistency, dryness
+    /ponds/{id}/observations    monthly rows (?start=&end=, paginated)
+    /ranking                    reliability ranking (paginated)
+    /risk                       dryness risk (?min_ratio=50, paginated)
+    /anomalies                  ?method=&metric= (see pond_anomaly.DETECTORS)
+    /kpis, /status, /trend      ?start=&end= month range (month buckets)
+
+List endpoints take ``page`` (1-based) and ``page_size`` (default 100, max
+5000). Handlers are async; the pandas work runs in a worker thread. Tables are
+built once per data version (shared with the apps through ``pond_cache``),
+and serialized responses are kept in an LRU keyed by data version + URL,
+with an ETag so unchanged results cost a 304.
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+from aiohttp import web
+
+import pond_aggregates
+import pond_analytics
+import pond_anomaly
+import pond_cache
+import pond_data
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 5000
+RESPONSE_CACHE_SIZE = 512
+VERSION_CHECK_SECONDS = 5
+
+_DATE_ARG_RE = re.compile(r"\d{4}(-\d{2}(-\d{2})?)?")  # YYYY[-MM[-DD]]
+
+# Derived tables shared with the apps through pond_cache (same cache names
+# as analytics.py / anomaly_detection.py); the rest are cheap to rebuild
+SHARED_TABLES = {
+    "summary": "pond_summary",
+    "ranking": "reliability_ranking",
+    "risk": "dryness_risk",
+    "buckets": "month_buckets",
+    "anomalies": "anomalies",
+}
+
+
+# --- TABLES (ONE SET PER DATA VERSION) ---
+class PondTables:
+    """Loaded frame and derived tables for one data version, built lazily.
+
+    ``version`` is fixed for the object's lifetime; a new data version gets a
+    new ``PondTables`` (see ``LiveTables``), so a build still running for the
+    old version can never land in the new one's tables or cache keys.
+    """
+
+    def __init__(self, source: str = pond_data.DATA_PATH, version: str = None):
+        self.source = source
+        self.version = version
+        self.tables = {}
+        self.lock = threading.RLock()
+
+    def get(self, name: str, *parts):
+        key = (name,) + parts
+        with self.lock:  # views run on worker threads; build each table once
+            if key not in self.tables:
+                build = functools.partial(self._build, name, *parts)
+                shared = SHARED_TABLES.get(name)
+                self.tables[key] = (pond_cache.memoize(shared, self.version, build, *parts)
+                                    if shared else build())
+            return self.tables[key]
+
+    def _build(self, name, *parts):
+        if name == "df":
+            return pond_cache.load_dataset(self.source)
+        if name == "index":
+            return pond_data.build_pond_index(self.get("df"))
+        if name == "agg":
+            return pond_aggregates.build_pond_aggregates(self.get("df"))
+        if name == "summary":
+            return pond_analytics.classify_aggregates(self.get("agg"))
+        if name == "ranking":
+            return pond_analytics.reliability_ranking(self.get("agg"))
+        if name == "risk":
+            return pond_analytics.dryness_risk(self.get("agg"))
+        if name == "buckets":
+            return pond_analytics.build_month_buckets(self.get("df"))
+        if name == "anomalies":
+            method, metric = parts
+            return pond_anomaly.detect_anomalies(self.get("df"), method, metric=metric)
+        raise KeyError(name)
+
+
+class LiveTables:
+    """The ``PondTables`` for the source's current data version."""
+
+    def __init__(self, source: str = pond_data.DATA_PATH):
+        self.source = source
+        self.current = PondTables(source)
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self) -> PondTables:
+        """Re-read the data version (at most every few seconds); tables for that version."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.checked < VERSION_CHECK_SECONDS and self.current.version is not None:
+                return self.current
+            self.checked = now
+            version = pond_data.data_version(self.source)
+            if version != self.current.version:
+                self.current = PondTables(self.source, version)
+            return self.current
+
+
+# --- HELPERS ---
+def _records_json(df: pd.DataFrame) -> str:
+    return df.to_json(orient="records", date_format="iso")
+
+
+def _paginate(request, df: pd.DataFrame) -> str:
+    try:
+        page = max(1, int(request.query.get("page", 1)))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(request.query.get("page_size", DEFAULT_PAGE_SIZE))))
+    except ValueError:
+        raise web.HTTPBadRequest(text="page and page_size must be integers") from None
+    total = len(df)
+    start = (page - 1) * page_size
+    meta = {"page": page, "page_size": page_size, "total": total,
+            "pages": max(1, -(-total // page_size))}
+    # Envelope around the C-serialized rows (no per-row Python)
+    return json.dumps(meta)[:-1] + ', "items": ' + _records_json(df.iloc[start:start + page_size]) + "}"
+
+
+def _month_arg(request, name: str):
+    """``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD``; a year or month ``end`` covers all of it."""
+    value = request.query.get(name)
+    if not value:
+        return None
+    match = _DATE_ARG_RE.fullmatch(value)
+    try:
+        ts = pd.Timestamp(value) if match else None
+    except ValueError:
+        ts = None
+    if ts is None:
+        raise web.HTTPBadRequest(text=f"{name} must be YYYY, YYYY-MM or YYYY-MM-DD, e.g. 2024-06") from None
+    if name == "end" and not match.group(1):
+        return ts + pd.offsets.YearEnd(0)
+    if name == "end" and not match.group(2):
+        return ts + pd.offsets.MonthEnd(0)
+    return ts
+
+
+def _pond_id(request) -> int:
+    try:
+        return int(request.match_info["pond_id"])
+    except ValueError:
+        raise web.HTTPBadRequest(text="pond id must be an integer") from None
+
+
+# --- VIEWS (sync; return JSON text, run in a worker thread by ``create_app``) ---
+def health(request, tables: PondTables):
+    df = tables.get("df")
+    if df is None:
+        raise web.HTTPServiceUnavailable(text=f"Data file not found: {tables.source}")
+    return json.dumps({"status": "ok", "data_version": tables.version,
+                       "rows": len(df), "ponds": len(tables.get("index"))})
+
+
+def ponds(request, tables: PondTables):
+    summary = tables.get("summary")
+    condition = request.query.get("condition")
+    if condition:
+        summary = summary[summary["Condition"] == condition]
+    return _paginate(request, summary)
+
+
+def pond_detail(request, tables: PondTables):
+    pond_id = _pond_id(request)
+    summary = tables.get("summary")
+    row = summary[summary["PondID"] == pond_id]
+    if row.empty:
+        raise web.HTTPNotFound(text=f"Unknown pond {pond_id}")
+    out = json.loads(_records_json(row))[0]
+    ranking = tables.get("ranking")
+    risk = tables.get("risk").reset_index()
+    out["Consistency"] = float(ranking.loc[ranking["PondID"] == pond_id, "Consistency"].iloc[0])
+    out["DryRatio"] = float(risk.loc[risk["PondID"] == pond_id, "DryRatio"].iloc[0])
+    return json.dumps(out)
+
+
+def pond_observations(request, tables: PondTables):
+    pond_id = _pond_id(request)
+    index = tables.get("index")
+    if pond_id not in index:
+        raise web.HTTPNotFound(text=f"Unknown pond {pond_id}")
+    dfp = pond_data.pond_slice(tables.get("df"), index, pond_id)
+    dfp = pond_data.date_window(dfp, _month_arg(request, "start"), _month_arg(request, "end"))
+    return _paginate(request, dfp.drop(columns=pond_data.STATUS_COLS, errors="ignore"))
+
+
+def ranking(request, tables: PondTables):
+    return _paginate(request, tables.get("ranking"))
+
+
+def risk(request, tables: PondTables):
+    try:
+        min_ratio = float(request.query.get("min_ratio", 50))
+    except ValueError:
+        raise web.HTTPBadRequest(text="min_ratio must be a number") from None
+    risk_stats = tables.get("risk").reset_index()
+    high = risk_stats[risk_stats["DryRatio"] >= min_ratio]
+    return _paginate(request, high.sort_values("DryRatio", ascending=False))
+
+
+def anomalies(request, tables: PondTables):
+    method = request.query.get("method", "zscore")
+    metric = request.query.get("metric", "NDVIMean")
+    if method not in pond_anomaly.DETECTORS:
+        raise web.HTTPBadRequest(text=f"Unknown method '{method}'. Choose from: {', '.join(pond_anomaly.DETECTORS)}")
+    if metric not in pond_anomaly.METRIC_LABELS:
+        raise web.HTTPBadRequest(text=f"Unknown metric '{metric}'. Choose from: {', '.join(pond_anomaly.METRIC_LABELS)}")
+    if metric not in tables.get("df").columns:
+        raise web.HTTPBadRequest(text=f"Metric '{metric}' is not in this data")
+    try:
+        found = tables.get("anomalies", method, metric)
+    except ValueError as e:  # the detector cannot run on these columns
+        raise web.HTTPBadRequest(text=str(e)) from None
+    return _paginate(request, found)
+
+
+def kpis(request, tables: PondTables):
+    start, end = _month_arg(request, "start"), _month_arg(request, "end")
+    return json.dumps(pond_analytics.bucket_kpis(tables.get("buckets"), start, end))
+
+
+def status(request, tables: PondTables):
+    start, end = _month_arg(request, "start"), _month_arg(request, "end")
+    return _records_json(pond_analytics.bucket_status_counts(tables.get("buckets"), start, end))
+
+
+def trend(request, tables: PondTables):
+    start, end = _month_arg(request, "start"), _month_arg(request, "end")
+    return _records_json(pond_analytics.bucket_water_trend(tables.get("buckets"), start, end))
+
+
+ROUTES = [
+    ("/health", health),
+    ("/ponds", ponds),
+    ("/ponds/{pond_id}", pond_detail),
+    ("/ponds/{pond_id}/observations", pond_observations),
+    ("/ranking", ranking),
+    ("/risk", risk),
+    ("/anomalies", anomalies),
+    ("/kpis", kpis),
+    ("/status", status),
+    ("/trend", trend),
+]
+
+
+# --- APP ---
+def create_app(source: str = pond_data.DATA_PATH, cache_size: int = RESPONSE_CACHE_SIZE) -> web.Application:
+    live = LiveTables(source)
+    responses = OrderedDict()  # (version, url) -> (etag, body); LRU
+    inflight = {}  # (version, url) -> Future, so concurrent misses share one build
+
+    def endpoint(view):
+        async def handler(request):
+            loop = asyncio.get_running_loop()
+            # One version per request: the view only sees tables built for it
+            tables = await loop.run_in_executor(None, live.refresh)
+            version = tables.version
+            if version is None and view is not health:
+                raise web.HTTPServiceUnavailable(text=f"Data file not found: {source}")
+
+            key = (version, str(request.rel_url))
+            cached = responses.get(key)
+            if cached is not None:
+                responses.move_to_end(key)
+            else:
+                future = inflight.get(key)
+                if future is None:
+                    # pandas work runs off the event loop
+                    future = inflight[key] = loop.run_in_executor(None, view, request, tables)
+                try:
+                    body = await future
+                finally:
+                    inflight.pop(key, None)
+                etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+                cached = responses[key] = (etag, body)
+                while len(responses) > cache_size:
+                    responses.popitem(last=False)
+
+            etag, body = cached
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            return web.Response(text=body, content_type="application/json",
+                                headers={"ETag": etag, "Cache-Control": "no-cache"})
+        return handler
+
+    app = web.Application()
+    for path, view in ROUTES:
+        app.router.add_get(path, endpoint(view))
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve pond analytics as a JSON API.")
+    parser.add_argument("--data", default=pond_data.DATA_PATH, help="source workbook, directory or glob")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(args.data), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
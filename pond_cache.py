@@ -0,0 +1,282 @@
+"""Cross-session cache for loaded and derived pond tables.
+
+``st.cache_data`` lives inside one Streamlit process: every replica behind
+the load balancer rebuilds the same tables, and a restart loses them. This
+module adds a second, shared level keyed by the data version (content hash
+of the source, see ``pond_data.data_version``), so a replica can warm-start
+from work another replica already did.
+
+Backends, chosen with the ``POND_CACHE_URL`` environment variable:
+
+* unset / ``disk`` / ``disk:///path`` -- pickled entries in a directory
+  (default ``data/.cache/shared``) indexed by SQLite, with per-entry TTL and
+  least-recently-used eviction above a size limit. Point all replicas at the
+  same volume to share it.
+* ``redis://host:port/db`` -- any Redis-compatible server (Redis, Valkey,
+  KeyDB...). Entries carry a TTL; size limits and LRU eviction are the
+  server's ``maxmemory`` / ``allkeys-lru`` settings. Needs the ``redis``
+  package.
+
+Keys include the data version and a hash of the source of the modules that
+compute the tables (``LOGIC_MODULES``), so changing a threshold, detector or
+default starts a fresh key space on every replica instead of serving old
+results until the TTL runs out.
+
+Cache failures never break an app: on any backend error the value is
+computed as if the cache were empty, and a backend that cannot be created
+at all (unwritable directory, locked index) is replaced by ``NullCache``.
+"""
+import hashlib
+import importlib.util
+import os
+import pickle
+import sqlite3
+import time
+import warnings
+from contextlib import contextmanager
+
+import pond_data
+
+CACHE_URL_ENV = "POND_CACHE_URL"
+SHARED_DIR = os.path.join(pond_data.CACHE_DIR, "shared")
+
+MAX_BYTES = int(os.environ.get("POND_CACHE_MAX_MB", "512")) << 20
+DEFAULT_TTL = int(os.environ.get("POND_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+
+# Modules whose code produces the cached tables
+LOGIC_MODULES = ("pond_data", "pond_xlsx", "pond_aggregates", "pond_analytics", "pond_anomaly")
+
+_MISS = object()
+_BACKEND = None
+
+
+def _logic_version(modules=LOGIC_MODULES) -> str:
+    """Hash of the source of ``modules``; changes whenever their code does."""
+    digest = hashlib.sha256()
+    for name in modules:
+        spec = importlib.util.find_spec(name)
+        if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+            continue
+        with open(spec.origin, "rb") as f:
+            digest.update(name.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()[:16]
+
+
+LOGIC_VERSION = _logic_version()
+
+
+# --- DISK BACKEND ---
+class DiskCache:
+    """Pickle files plus a SQLite index (size, last access, expiry)."""
+
+    def __init__(self, path: str = SHARED_DIR, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.index = os.path.join(path, "index.sqlite3")
+        os.makedirs(path, exist_ok=True)
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, size INTEGER, created REAL,"
+                " accessed REAL, expires REAL)"
+            )
+
+    @contextmanager
+    def _db(self):
+        # One short-lived connection per call: safe across threads and replicas
+        db = sqlite3.connect(self.index, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pkl")
+
+    def get(self, key: str, default=None):
+        now = time.time()
+        with self._db() as db:
+            row = db.execute("SELECT expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            if row[0] is not None and row[0] < now:
+                self._drop(db, [key])
+                return default
+            try:
+                with open(self._file(key), "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self._drop(db, [key])
+                return default
+            db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value, ttl: int = DEFAULT_TTL):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        dest = self._file(key)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        now = time.time()
+        with self._db() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, len(payload), now, now, now + ttl if ttl else None),
+            )
+            self._evict(db, now)
+
+    def _drop(self, db, keys):
+        db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+        for key in keys:
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+
+    def _evict(self, db, now: float):
+        """Expired entries first, then least recently used until under the limit."""
+        expired = db.execute("SELECT key FROM entries WHERE expires < ?", (now,)).fetchall()
+        self._drop(db, [k for (k,) in expired])
+
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            victims.append(key)
+            total -= size
+        self._drop(db, victims)
+
+    def clear(self):
+        with self._db() as db:
+            self._drop(db, [k for (k,) in db.execute("SELECT key FROM entries").fetchall()])
+
+    def stats(self) -> dict:
+        with self._db() as db:
+            n, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"backend": "disk", "entries": n, "bytes": size, "max_bytes": self.max_bytes}
+
+
+# --- REDIS BACKEND ---
+class RedisCache:
+    """Redis-compatible server; eviction policy is configured on the server."""
+
+    def __init__(self, url: str, prefix: str = "pond:"):
+        import redis  # optional dependency
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str, default=None):
+        payload = self.client.get(self.prefix + key)
+        return default if payload is None else pickle.loads(payload)
+
+    def set(self, key: str, value, ttl: int = DEFAULT_TTL):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, payload, ex=ttl or None)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self) -> dict:
+        info = self.client.info("memory")
+        return {"backend": "redis", "bytes": info.get("used_memory"),
+                "max_bytes": info.get("maxmemory")}
+
+
+# --- NO-OP BACKEND ---
+class NullCache:
+    """Stores nothing; used when the configured backend cannot be created."""
+
+    def get(self, key: str, default=None):
+        return default
+
+    def set(self, key: str, value, ttl: int = DEFAULT_TTL):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "none", "entries": 0, "bytes": 0, "max_bytes": 0}
+
+
+# --- PUBLIC API ---
+def _create_backend(url: str):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return RedisCache(url)
+        except ImportError:
+            warnings.warn(f"{CACHE_URL_ENV}={url} needs the 'redis' package; using the disk cache")
+            return DiskCache()
+    if url.startswith("disk://"):
+        return DiskCache(url[len("disk://"):] or SHARED_DIR)
+    return DiskCache()
+
+
+def get_cache():
+    """Backend selected by ``POND_CACHE_URL`` (created once per process)."""
+    global _BACKEND
+    if _BACKEND is None:
+        url = os.environ.get(CACHE_URL_ENV, "disk")
+        try:
+            _BACKEND = _create_backend(url)
+        except Exception as e:
+            warnings.warn(f"Shared cache {url} is unavailable ({e}); running without it")
+            _BACKEND = NullCache()
+    return _BACKEND
+
+
+def cache_key(name: str, version: str, *parts) -> str:
+    """Stable key for ``name`` computed from data ``version`` with ``parts``."""
+    raw = "|".join([f"v{pond_data.CACHE_VERSION}", LOGIC_VERSION, name, str(version)]
+                   + [repr(p) for p in parts])
+    return f"{name}-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]}"
+
+
+def memoize(name: str, version: str, compute, *parts, ttl: int = DEFAULT_TTL):
+    """Return the shared cached value for ``(name, version, parts)``, computing it on a miss.
+
+    ``version`` ``None`` (no data) bypasses the cache.
+    """
+    if version is None:
+        return compute()
+    key = cache_key(name, version, *parts)
+    try:
+        value = get_cache().get(key, _MISS)
+    except Exception:
+        value = _MISS
+    if value is not _MISS:
+        return value
+
+    value = compute()
+    try:
+        get_cache().set(key, value, ttl)
+    except Exception:
+        pass  # a cache that cannot be written only costs speed
+    return value
+
+
+def load_dataset(source: str = pond_data.DATA_PATH):
+    """The normalized pond frame for ``source``, shared across replicas.
+
+    With the disk backend replicas already share ``pond_data``'s Parquet cache
+    (same volume), so the frame is not stored twice.
+    """
+    if isinstance(get_cache(), (DiskCache, NullCache)):
+        return pond_data.load_pond_data(source)
+    version = pond_data.data_version(source)
+    return memoize("dataset", version, lambda: pond_data.load_pond_data(source))
@@ -0,0 +1,412 @@
+"""Shared data loader for the pond dashboards.
+
+Parsing ``shape-filtering-final.xlsx`` through openpyxl is the slowest part of a
+cold start, so the workbook is converted once to a normalized Parquet file and
+every app loads that instead. The cache is keyed on the content hash of the
+source workbook; the file's mtime/size are recorded in a small manifest so an
+unchanged file is recognised without re-hashing it. Workbooks are parsed by
+the streaming reader in ``pond_xlsx`` rather than openpyxl, so conversion of
+very large files stays fast and memory-bounded.
+
+The source may also be a directory or glob of xlsx/csv deliveries (one per
+block per quarter): every sheet of every file is parsed in parallel, merged,
+and de-duplicated on (PondID, MonthYear) into one cached dataset.
+
+    python pond_data.py "data/deliveries/*.xlsx" --out data/ponds.parquet
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pond_xlsx
+
+# --- CONFIGURATION ---
+DATA_PATH = "data/shape-filtering-final.xlsx"
+CACHE_DIR = os.path.join("data", ".cache")
+
+# Bump when the normalized schema changes so old caches are rebuilt
+CACHE_VERSION = 4
+
+RENAME_MAP = {
+    "Pond_ID": "PondID",
+    "Month_Year": "MonthYear",
+    "NDVI_Mean": "NDVIMean",
+    "NDWI_Mean": "NDWIMean",
+    "NDTI_Mean": "NDTIMean",
+    "VV_Mean": "VVMean",
+    "VH_Mean": "VHMean",
+    "Shape_Score": "ShapeScore",
+}
+NUM_COLS = ["NDVIMean", "NDWIMean", "NDTIMean", "VVMean", "VHMean", "ShapeScore"]
+
+# --- STATUS ENCODING ---
+# StatusCode (int8), same precedence as the old status_color() helper
+STATUS_HIGH, STATUS_LOW, STATUS_FALLOW, STATUS_OTHER = 0, 1, 2, 3
+STATUS_COLORS = np.array(["navy", "cyan", "saddlebrown", "gray"])
+
+# Confidence (int8)
+CONFIDENCE_NONE, CONFIDENCE_LOW, CONFIDENCE_HIGH = 0, 1, 2
+
+STATUS_COLS = ["StatusCode", "IsWater", "IsFallow", "Confidence"]
+
+
+# --- NORMALIZATION ---
+def normalize_pond_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename workbook columns and coerce dates / numeric columns."""
+    df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns})
+
+    # Parse month
+    df["Date"] = pd.to_datetime(df["MonthYear"], format="%Y-%m", errors="coerce")
+
+    # Force numeric columns (handles blanks)
+    for c in NUM_COLS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    # Status -> compact codes/flags so apps never regex-scan the strings
+    if "Status" in df.columns:
+        codes = encode_status(df["Status"])
+        for c in STATUS_COLS:
+            df[c] = codes[c].to_numpy()
+
+    return sort_ponds(df)
+
+
+def sort_ponds(df: pd.DataFrame) -> pd.DataFrame:
+    """Pond-major, date-ordered rows: each pond becomes one contiguous block."""
+    if "PondID" not in df.columns:
+        return df
+    df = df.sort_values(["PondID", "Date"], kind="stable", na_position="last")
+    return df.reset_index(drop=True)
+
+
+def encode_status(status: pd.Series) -> pd.DataFrame:
+    """Parse Status strings into StatusCode / IsWater / IsFallow / Confidence.
+
+    Matching is case-insensitive substring matching, done once per distinct
+    status string and broadcast to all rows through the factorized codes.
+    """
+    codes, uniques = pd.factorize(status)
+    # Trailing slot is used for missing values (factorize code -1)
+    lowered = [str(s).lower() for s in uniques] + [""]
+
+    kind = np.array([
+        STATUS_HIGH if "high confidence" in s
+        else STATUS_LOW if "low confidence" in s
+        else STATUS_FALLOW if "fallow" in s
+        else STATUS_OTHER
+        for s in lowered
+    ], dtype=np.int8)
+    confidence = np.array([
+        CONFIDENCE_HIGH if "high confidence" in s
+        else CONFIDENCE_LOW if "low confidence" in s
+        else CONFIDENCE_NONE
+        for s in lowered
+    ], dtype=np.int8)
+    is_water = np.array(["water" in s for s in lowered], dtype=bool)
+    is_fallow = np.array(["fallow" in s for s in lowered], dtype=bool)
+
+    return pd.DataFrame({
+        "StatusCode": kind[codes],
+        "IsWater": is_water[codes],
+        "IsFallow": is_fallow[codes],
+        "Confidence": confidence[codes],
+    }, index=status.index)
+
+
+def status_flags(df: pd.DataFrame):
+    """``(IsWater, IsFallow)`` boolean Series, encoding Status if needed."""
+    if "IsWater" in df.columns and "IsFallow" in df.columns:
+        return df["IsWater"], df["IsFallow"]
+    codes = encode_status(df["Status"])
+    return codes["IsWater"], codes["IsFallow"]
+
+
+def status_codes(df: pd.DataFrame) -> np.ndarray:
+    """StatusCode per row, encoding Status if needed."""
+    if "StatusCode" in df.columns:
+        return df["StatusCode"].to_numpy()
+    return encode_status(df["Status"])["StatusCode"].to_numpy()
+
+
+def status_colors(df: pd.DataFrame) -> np.ndarray:
+    """Marker colour per row (navy / cyan / saddlebrown / gray)."""
+    return STATUS_COLORS[status_codes(df)]
+
+
+# --- POND INDEX ---
+def build_pond_index(df: pd.DataFrame) -> dict:
+    """``{PondID: (start, stop)}`` row offsets into a pond-sorted frame."""
+    ids = df["PondID"].to_numpy()
+    n = int(df["PondID"].notna().sum())  # NaN PondIDs are sorted last
+    ids = ids[:n]
+    if n == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    stops = np.r_[starts[1:], n]
+    return {int(ids[a]): (int(a), int(b)) for a, b in zip(starts, stops)}
+
+
+def pond_slice(df: pd.DataFrame, pond_index: dict, pond_id) -> pd.DataFrame:
+    """Date-ordered rows for one pond as a positional slice (no full scan)."""
+    start, stop = pond_index.get(int(pond_id), (0, 0))
+    return df.iloc[start:stop]
+
+
+def date_window(dfp: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Rows of a date-ordered slice with ``start <= Date <= end`` (binary search).
+
+    ``None`` leaves that side of the window open.
+    """
+    dates = dfp["Date"].to_numpy()
+    lo, hi = 0, len(dates)
+    if start is not None:
+        lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side="left")
+    if end is not None:
+        hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side="right")
+    return dfp.iloc[lo:hi]
+
+
+def read_sheet(source, sheet=0, row_numbers: bool = False) -> pd.DataFrame:
+    """One worksheet as a raw DataFrame via the streaming reader.
+
+    Files the streaming reader cannot open (e.g. legacy ``.xls``) go through
+    ``pd.read_excel`` instead. ``row_numbers`` indexes the rows by sheet row
+    (for ``read_excel``, assuming no blank rows before the last record).
+    """
+    try:
+        return pond_xlsx.read_sheet(source, sheet, row_numbers=row_numbers)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        df = pd.read_excel(source, sheet_name=sheet)
+        if row_numbers:
+            df.index = df.index + 2  # 1-based, after the header
+        return df
+
+
+def read_pond_workbook(source) -> pd.DataFrame:
+    """Parse the first sheet of a workbook (path or file-like) and normalize it."""
+    return normalize_pond_frame(read_sheet(source, 0))
+
+
+# --- MULTI-FILE INGEST ---
+SOURCE_EXTS = (".xlsx", ".csv")
+
+
+def expand_sources(source: str) -> list:
+    """Files behind ``source`` (a file, a directory, or a glob pattern).
+
+    Directory/glob results are ordered oldest -> newest by mtime, so later
+    deliveries win when rows are de-duplicated. Office lock files (``~$...``)
+    and hidden files are ignored.
+    """
+    if os.path.isfile(source):
+        return [source]
+    if os.path.isdir(source):
+        candidates = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        candidates = glob.glob(source)
+
+    files = [
+        p for p in candidates
+        if os.path.isfile(p)
+        and p.lower().endswith(SOURCE_EXTS)
+        and not os.path.basename(p).startswith(("~$", "."))
+    ]
+    return sorted(files, key=lambda p: (os.stat(p).st_mtime_ns, p))
+
+
+def read_pond_file(path: str) -> pd.DataFrame:
+    """Parse every sheet of an xlsx (or a csv) delivery and normalize it."""
+    if path.lower().endswith(".csv"):
+        frames = [pd.read_csv(path)]
+    else:
+        frames = [read_sheet(path, name) for name in pond_xlsx.sheet_names(path)]
+
+    # Skip cover/notes sheets that do not carry pond rows
+    frames = [f for f in frames if "Pond_ID" in f.columns or "PondID" in f.columns]
+    if not frames:
+        return pd.DataFrame()
+    return normalize_pond_frame(pd.concat(frames, ignore_index=True))
+
+
+def ingest_pond_files(paths, workers=None) -> pd.DataFrame:
+    """Parse ``paths`` across a process pool into one de-duplicated frame."""
+    paths = list(paths)
+    if len(paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(read_pond_file, paths))
+    else:
+        frames = [read_pond_file(p) for p in paths]
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+
+    # Re-delivered months: the newest file's row wins
+    df = df.drop_duplicates(subset=["PondID", "MonthYear"], keep="last")
+    return sort_ponds(df)
+
+
+# --- CACHE HELPERS ---
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _manifest_path(source: str, cache_dir: str) -> str:
+    key = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, f"{stem}-{key}.json")
+
+
+def _cache_path(sha: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{sha[:24]}-v{CACHE_VERSION}.parquet")
+
+
+def _read_manifest(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write_json(path: str, payload: dict):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _write_parquet(df: pd.DataFrame, path: str) -> bool:
+    """Write the columnar cache atomically; a failed write only costs speed."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+
+def _fingerprint(source: str, cache_dir: str):
+    """Return ``(sha256, stat, manifest_is_current)`` for ``source``."""
+    stat = os.stat(source)
+    manifest = _read_manifest(_manifest_path(source, cache_dir))
+    if (
+        manifest
+        and manifest.get("mtime_ns") == stat.st_mtime_ns
+        and manifest.get("size") == stat.st_size
+    ):
+        return manifest["sha256"], stat, True
+    return file_sha256(source), stat, False
+
+
+def _remember(source: str, stat, sha: str, cache_dir: str):
+    os.makedirs(cache_dir, exist_ok=True)
+    _atomic_write_json(_manifest_path(source, cache_dir), {
+        "source": os.path.abspath(source),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha,
+        "version": CACHE_VERSION,
+    })
+
+
+def _dataset_fingerprint(source: str, cache_dir: str):
+    """``(dataset_sha, paths, per_file_fingerprints)``; sha is None if no files."""
+    paths = expand_sources(source)
+    prints = [_fingerprint(p, cache_dir) for p in paths]
+    if not paths:
+        return None, paths, prints
+    if os.path.isfile(source):
+        return prints[0][0], paths, prints
+    # Multi-file datasets: hash of the ordered per-file hashes
+    combined = "multi|" + "|".join(sha for sha, _, _ in prints)
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest(), paths, prints
+
+
+def data_version(source: str = DATA_PATH, cache_dir: str = CACHE_DIR):
+    """Content hash of ``source``, re-hashing only files whose mtime or size changed."""
+    return _dataset_fingerprint(source, cache_dir)[0]
+
+
+# --- PUBLIC LOADER ---
+def load_pond_data(source: str = DATA_PATH, cache_dir: str = CACHE_DIR, workers=None):
+    """Load the normalized pond table, converting the source only on change.
+
+    ``source`` is a workbook (first sheet), or a directory / glob of xlsx and
+    csv files (all sheets, parsed on ``workers`` processes). Returns ``None``
+    when no source file exists.
+    """
+    sha, paths, prints = _dataset_fingerprint(source, cache_dir)
+    if sha is None:
+        return None
+    cache_path = _cache_path(sha, cache_dir)
+
+    df = None
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+        except Exception:
+            df = None  # corrupt or unreadable cache -> rebuild below
+
+    if df is None:
+        if os.path.isfile(source):
+            df = read_pond_workbook(source)
+        else:
+            df = ingest_pond_files(paths, workers)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            return df  # read-only data directory: serve the parsed frame uncached
+        _write_parquet(df, cache_path)
+
+    for path, (file_sha, stat, current) in zip(paths, prints):
+        if not current:
+            try:
+                _remember(path, stat, file_sha, cache_dir)
+            except OSError:
+                break  # the manifest only saves re-hashing next time
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consolidate pond deliveries into one Parquet file.")
+    parser.add_argument("source", help="workbook, directory, or glob of xlsx/csv files")
+    parser.add_argument("--out", help="write the consolidated dataset here (.parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    df = load_pond_data(args.source, workers=args.workers)
+    if df is None:
+        print(f"❌ No xlsx/csv files found for: {args.source}")
+        return 1
+
+    files = len(expand_sources(args.source))
+    print(f"✅ {len(df):,} rows, {df['PondID'].nunique():,} ponds from {files} file(s)")
+    if args.out:
+        df.to_parquet(args.out, index=False)
+        print(f"💾 Saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
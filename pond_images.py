@@ -0,0 +1,118 @@
+"""Pond image helpers: image index and cached thumbnails for the gallery.
+
+The image folder is scanned once into an index (naturally sorted file list +
+PondID -> paths) that is only rebuilt when the directory's mtime changes, so
+apps resolve a pond's image with a dict lookup instead of listdir/exists.
+
+Full-size pond PNGs are ~90 KB each; the gallery grid only needs small
+previews. Thumbnails are written once to ``<img_dir>/.thumbs`` and named after
+the source file's mtime, so editing an image produces a fresh thumbnail and
+stale ones are simply never referenced again.
+"""
+import os
+import re
+
+IMG_DIR = "images"
+IMG_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+# "Pond_12_Final.png", "pond-12.jpg", ... -> 12
+_POND_ID_RE = re.compile(r"pond[_\s-]*(\d+)", re.IGNORECASE)
+
+# abs dir -> (dir mtime_ns, sorted file names, {PondID: [paths]})
+_INDEX_CACHE = {}
+
+THUMB_DIR_NAME = ".thumbs"
+THUMB_MAX_PX = 320
+THUMB_FORMAT = "WEBP"  # falls back to JPEG if this Pillow build lacks WebP
+
+
+# --- IMAGE INDEX ---
+def natural_key(name: str):
+    """Sort key that orders Pond_2 before Pond_10."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def _load_index(img_dir: str):
+    key = os.path.abspath(img_dir)
+    try:
+        mtime_ns = os.stat(img_dir).st_mtime_ns
+    except OSError:
+        _INDEX_CACHE.pop(key, None)
+        return [], {}
+
+    cached = _INDEX_CACHE.get(key)
+    if cached and cached[0] == mtime_ns:
+        return cached[1], cached[2]
+
+    with os.scandir(img_dir) as entries:
+        files = sorted(
+            (e.name for e in entries if e.is_file() and e.name.lower().endswith(IMG_EXTS)),
+            key=natural_key,
+        )
+    by_pond = {}
+    for name in files:
+        match = _POND_ID_RE.search(name)
+        if match:
+            by_pond.setdefault(int(match.group(1)), []).append(os.path.join(img_dir, name))
+
+    _INDEX_CACHE[key] = (mtime_ns, files, by_pond)
+    return files, by_pond
+
+
+def list_images(img_dir: str = IMG_DIR) -> list:
+    """Image file names in ``img_dir``, naturally sorted (empty if missing)."""
+    return _load_index(img_dir)[0]
+
+
+def pond_images_for(pond_id, img_dir: str = IMG_DIR) -> list:
+    """All image paths for ``pond_id`` (any supported extension)."""
+    return _load_index(img_dir)[1].get(int(pond_id), [])
+
+
+def pond_image(pond_id, img_dir: str = IMG_DIR):
+    """First image path for ``pond_id``, or ``None``."""
+    paths = pond_images_for(pond_id, img_dir)
+    return paths[0] if paths else None
+
+
+# --- THUMBNAILS ---
+def _thumb_path(src: str, max_px: int, ext: str) -> str:
+    folder = os.path.join(os.path.dirname(src), THUMB_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(src))[0]
+    mtime_ns = os.stat(src).st_mtime_ns
+    return os.path.join(folder, f"{stem}-{mtime_ns}-{max_px}.{ext}")
+
+
+def thumbnail(src: str, max_px: int = THUMB_MAX_PX) -> str:
+    """Path to a thumbnail of ``src`` no larger than ``max_px`` on either side.
+
+    Generates it on first use. If Pillow is unavailable or the image cannot be
+    processed, the original path is returned so the gallery still works.
+    """
+    for fmt, ext in ((THUMB_FORMAT, "webp"), ("JPEG", "jpg")):
+        dest = _thumb_path(src, max_px, ext)
+        if os.path.exists(dest):
+            return dest
+        try:
+            _write_thumbnail(src, dest, max_px, fmt)
+            return dest
+        except (ImportError, OSError, KeyError, ValueError):
+            continue
+    return src
+
+
+def _write_thumbnail(src: str, dest: str, max_px: int, fmt: str):
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with Image.open(src) as im:
+        im.thumbnail((max_px, max_px))
+        if fmt == "JPEG" and im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        try:
+            im.save(tmp, format=fmt, quality=80)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
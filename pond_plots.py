@@ -0,0 +1,133 @@
+"""Pond time-series figure shared by the dashboards and the batch renderer.
+
+Long series (weekly/daily Sentinel data) are decimated server-side before they
+reach the browser: each index trace is reduced to at most ``max_points`` with
+min-max bucketing (or LTTB), status markers keep every status change, and
+above ``webgl_threshold`` points the traces switch to WebGL (``Scattergl``).
+The apps call this on the rows inside the date-slider window, so the
+decimation always matches what is on screen. Monthly data (a few dozen
+points) is drawn unchanged.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import pond_data
+
+MAX_POINTS = 2000
+WEBGL_THRESHOLD = 1000
+
+
+# --- DOWNSAMPLING ---
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the min and max of each of ``n_out // 2`` equal buckets (vectorized)."""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(1, n_out // 2)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+
+    offsets = np.arange(n_buckets) * size
+    lo = np.where(np.isnan(buckets), np.inf, buckets).argmin(axis=1) + offsets
+    hi = np.where(np.isnan(buckets), -np.inf, buckets).argmax(axis=1) + offsets
+    idx = np.unique(np.concatenate([lo, hi, [0, n - 1]]))
+    return idx[idx < n]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keeps the visually important points."""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def decimate(dates: pd.Series, values: pd.Series, max_points: int = MAX_POINTS,
+             method: str = "minmax"):
+    """``(dates, values)`` reduced to about ``max_points`` (NaNs dropped first)."""
+    if len(values) <= max_points:
+        return dates, values
+    keep = values.notna().to_numpy()
+    dates, values = dates[keep], values[keep]
+    y = values.to_numpy(dtype=float)
+    if method == "lttb":
+        x = dates.to_numpy().astype("datetime64[ns]").astype(np.int64).astype(float)
+        idx = lttb_indices(x, y, max_points)
+    else:
+        idx = minmax_indices(y, max_points)
+    return dates.iloc[idx], values.iloc[idx]
+
+
+def status_marker_rows(dfp: pd.DataFrame, max_points: int = MAX_POINTS) -> np.ndarray:
+    """Row positions for status markers: every status change, then a stride."""
+    n = len(dfp)
+    if n <= max_points:
+        return np.arange(n)
+    codes = pd.Series(pond_data.status_codes(dfp))
+    changes = np.flatnonzero(codes.ne(codes.shift()).to_numpy())
+    idx = np.union1d(changes, [n - 1])
+    if len(idx) > max_points:
+        idx = idx[np.linspace(0, len(idx) - 1, max_points).astype(int)]
+    else:
+        stride = np.arange(0, n, max(1, n // max(1, max_points - len(idx))))
+        idx = np.union1d(idx, stride)
+    return idx
+
+
+# --- FIGURE ---
+def make_plot(dfp: pd.DataFrame, pond_id: int, max_points: int = MAX_POINTS,
+              webgl_threshold: int = WEBGL_THRESHOLD, method: str = "minmax"):
+    fig = go.Figure()
+    scatter = go.Scattergl if len(dfp) > webgl_threshold else go.Scatter
+
+    def series(col):
+        return decimate(dfp["Date"], dfp[col], max_points, method)
+
+    # Optical indices (left axis)
+    x, y = series("NDVIMean")
+    fig.add_trace(scatter(x=x, y=y, mode="lines+markers", name="NDVI"))
+    x, y = series("NDTIMean")
+    fig.add_trace(scatter(x=x, y=y, mode="lines+markers", name="NDTI"))
+
+    # SAR VV (right axis)
+    x, y = series("VVMean")
+    fig.add_trace(scatter(x=x, y=y, mode="lines+markers",
+                          name="VV", yaxis="y2", line=dict(dash="dash")))
+
+    # Status markers (colour via StatusCode lookup, no per-row Python)
+    ds = dfp.iloc[status_marker_rows(dfp, max_points)]
+    fig.add_trace(scatter(
+        x=ds["Date"],
+        y=np.zeros(len(ds)),  # a reference line
+        mode="markers",
+        name="Status",
+        marker=dict(size=10, color=pond_data.status_colors(ds)),
+        hovertext=ds["Status"].astype(str) + "<br>" + ds["Reason"].astype(str),
+        hoverinfo="text"
+    ))
+
+    fig.update_layout(
+        title=f"Pond {pond_id}: Multi-Spectral Dashboard",
+        xaxis_title="Date",
+        yaxis_title="Optical indices",
+        yaxis2=dict(title="SAR VV (dB)", overlaying="y", side="right"),
+        legend=dict(orientation="h")
+    )
+    return fig
@@ -0,0 +1,182 @@
+"""Headless batch renderer for the monthly pond report pack.
+
+Writes, per pond, the multi-spectral chart (PNG and/or HTML) and a CSV
+extract of its observations. Ponds are rendered in parallel across a process
+pool (kaleido PNG export is the slow part), and ponds whose data, date window
+and formats are unchanged since the last run are skipped using a content hash
+recorded in ``<out>/manifest.json``.
+
+Usage:
+    python pond_report.py                                  # all ponds, PNG + HTML + CSV
+    python pond_report.py --ponds 1 5 10-20 --start 2024-06 --end 2025-05
+    python pond_report.py --formats csv html --workers 8 --out reports/2025-11
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import pond_data
+
+FORMATS = ("png", "html", "csv")
+OUT_DIR = "reports"
+
+# Bump when the figure layout changes so every pond is re-rendered
+RENDER_VERSION = 1
+
+
+# --- HELPERS ---
+def parse_pond_ids(tokens) -> list:
+    """``["1", "5", "10-12"]`` -> ``[1, 5, 10, 11, 12]``."""
+    ids = []
+    for token in tokens:
+        for part in str(token).split(","):
+            if not part:
+                continue
+            if "-" in part:
+                lo, hi = part.split("-", 1)
+                ids.extend(range(int(lo), int(hi) + 1))
+            else:
+                ids.append(int(part))
+    return sorted(set(ids))
+
+
+def pond_hash(dfp: pd.DataFrame, formats) -> str:
+    """Content hash of a pond's rows plus everything that affects the output."""
+    h = hashlib.sha256()
+    h.update(f"v{RENDER_VERSION}|{','.join(sorted(formats))}|".encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(dfp, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def output_paths(out_dir: str, pond_id: int, formats) -> dict:
+    return {fmt: os.path.join(out_dir, f"pond_{pond_id}.{fmt}") for fmt in formats}
+
+
+def _load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# --- WORKER ---
+def render_pond(pond_id: int, dfp: pd.DataFrame, out_dir: str, formats) -> int:
+    """Write the requested outputs for one pond (runs in a worker process)."""
+    paths = output_paths(out_dir, pond_id, formats)
+
+    if "csv" in paths:
+        dfp.drop(columns=pond_data.STATUS_COLS, errors="ignore").to_csv(paths["csv"], index=False)
+
+    if "png" in paths or "html" in paths:
+        from pond_plots import make_plot
+
+        fig = make_plot(dfp, pond_id)
+        if "html" in paths:
+            fig.write_html(paths["html"], include_plotlyjs="cdn")
+        if "png" in paths:
+            fig.write_image(paths["png"], format="png")  # requires kaleido
+    return pond_id
+
+
+# --- MAIN ---
+def build_report(
+    df: pd.DataFrame,
+    out_dir: str = OUT_DIR,
+    ponds=None,
+    start=None,
+    end=None,
+    formats=FORMATS,
+    workers=None,
+    force: bool = False,
+    log=print,
+) -> dict:
+    """Render all (or the selected) ponds; returns ``{"rendered": [...], "skipped": [...]}``."""
+    os.makedirs(out_dir, exist_ok=True)
+    formats = tuple(formats)
+
+    d = df.dropna(subset=["PondID", "Date"])
+    if start is not None:
+        d = d[d["Date"] >= pd.Timestamp(start)]
+    if end is not None:
+        d = d[d["Date"] <= pd.Timestamp(end)]
+    if ponds:
+        d = d[d["PondID"].isin(ponds)]
+
+    manifest = _load_manifest(out_dir)
+    tasks, skipped = [], []
+    for pond_id, dfp in d.sort_values(["PondID", "Date"]).groupby("PondID", sort=True):
+        pond_id = int(pond_id)
+        digest = pond_hash(dfp, formats)
+        paths = output_paths(out_dir, pond_id, formats)
+        if (not force and manifest.get(str(pond_id)) == digest
+                and all(os.path.exists(p) for p in paths.values())):
+            skipped.append(pond_id)
+            continue
+        tasks.append((pond_id, dfp, digest))
+
+    rendered = []
+    if tasks:
+        log(f"Rendering {len(tasks)} pond(s) ({', '.join(formats)}), {len(skipped)} unchanged...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(render_pond, pond_id, dfp, out_dir, formats): (pond_id, digest)
+                for pond_id, dfp, digest in tasks
+            }
+            for future in as_completed(futures):
+                pond_id, digest = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    log(f"   ❌ Pond {pond_id} failed: {e}")
+                    manifest.pop(str(pond_id), None)
+                    continue
+                manifest[str(pond_id)] = digest
+                rendered.append(pond_id)
+
+        pond_data._atomic_write_json(os.path.join(out_dir, "manifest.json"), manifest)
+
+    return {"rendered": sorted(rendered), "skipped": skipped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render per-pond charts and CSV extracts.")
+    parser.add_argument("--data", default=pond_data.DATA_PATH, help="source workbook")
+    parser.add_argument("--out", default=OUT_DIR, help="output folder")
+    parser.add_argument("--ponds", nargs="*", help="pond IDs or ranges, e.g. 1 5 10-20")
+    parser.add_argument("--start", help="first month, YYYY-MM")
+    parser.add_argument("--end", help="last month, YYYY-MM")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="re-render unchanged ponds too")
+    args = parser.parse_args(argv)
+
+    df = pond_data.load_pond_data(args.data)
+    if df is None:
+        print(f"❌ Data file not found: {args.data}")
+        return 1
+
+    t0 = time.perf_counter()
+    result = build_report(
+        df,
+        out_dir=args.out,
+        ponds=parse_pond_ids(args.ponds) if args.ponds else None,
+        start=args.start,
+        end=args.end,
+        formats=args.formats,
+        workers=args.workers,
+        force=args.force,
+    )
+    print(f"✅ {len(result['rendered'])} rendered, {len(result['skipped'])} unchanged "
+          f"in {time.perf_counter() - t0:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Upload pipeline for workbooks dropped into the dashboards.
+
+Uploaded bytes are hashed first; identical content (the same weekly file
+re-uploaded by another analyst, or a rerun) is served from the Parquet cache
+in ``data/.cache`` together with its stored validation report, so only the
+first upload of a file pays the parse cost.
+
+Validation runs on the raw sheet before any coercion, so problems are
+reported up front instead of surfacing as KeyErrors in the plots:
+
+* missing required columns reject the upload;
+* row-level problems (unparseable month, missing/non-integer PondID,
+  non-numeric index values, duplicate pond-months) are listed with their
+  sheet row. Rows without a usable PondID are dropped; other bad values are
+  treated as missing.
+"""
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+import pond_data
+
+# Columns the dashboards cannot work without (normalized names)
+REQUIRED_COLS = ["PondID", "MonthYear", "Status", "Reason", "NDVIMean", "NDTIMean", "VVMean"]
+
+ISSUE_COLS = ["Row", "Column", "Value", "Problem"]
+
+
+# --- VALIDATION ---
+def _present(values: pd.Series) -> pd.Series:
+    """Non-blank cells (blank strings count as missing, as in read_excel)."""
+    return values.notna() & values.astype(str).str.strip().ne("")
+
+
+def _issues(mask, raw: pd.DataFrame, column: str, problem: str) -> pd.DataFrame:
+    rows = np.flatnonzero(np.asarray(mask, dtype=bool))
+    return pd.DataFrame({
+        "Row": raw.index.to_numpy()[rows],
+        "Column": column,
+        "Value": raw[column].to_numpy()[rows] if column in raw else None,
+        "Problem": problem,
+    })
+
+
+def validate_pond_frame(raw: pd.DataFrame):
+    """Check a raw (un-normalized) sheet, indexed by sheet row number.
+
+    Returns ``(missing_columns, issues)`` where ``issues`` has one row per
+    problem cell: ``Row, Column, Value, Problem``.
+    """
+    raw = raw.rename(columns={k: v for k, v in pond_data.RENAME_MAP.items() if k in raw.columns})
+    missing = [c for c in REQUIRED_COLS if c not in raw.columns]
+    if missing:
+        return missing, pd.DataFrame(columns=ISSUE_COLS)
+
+    found = []
+    pond = pd.to_numeric(raw["PondID"], errors="coerce")
+    bad_pond = pond.isna() | (pond % 1 != 0)
+    found.append(_issues(bad_pond, raw, "PondID", "Missing or non-integer PondID (row skipped)"))
+
+    month = pd.to_datetime(raw["MonthYear"], format="%Y-%m", errors="coerce")
+    found.append(_issues(month.isna(), raw, "MonthYear", "Month is not YYYY-MM"))
+
+    for col in pond_data.NUM_COLS:
+        if col in raw.columns:
+            bad = _present(raw[col]) & pd.to_numeric(raw[col], errors="coerce").isna()
+            found.append(_issues(bad, raw, col, "Not a number (treated as missing)"))
+
+    keyed = ~bad_pond & month.notna()
+    dup = keyed & pd.DataFrame({"p": pond, "m": month}).duplicated(keep="first")
+    found.append(_issues(dup, raw, "MonthYear", "Duplicate pond/month"))
+
+    issues = pd.concat(found, ignore_index=True)
+    issues["Value"] = issues["Value"].where(issues["Value"].notna(), "").astype(str)
+    return [], issues.sort_values(["Row", "Column"], kind="stable").reset_index(drop=True)
+
+
+def clean_pond_frame(raw: pd.DataFrame) -> pd.DataFrame:
+    """Normalize a validated sheet; rows without a usable PondID are dropped."""
+    df = pond_data.normalize_pond_frame(raw)
+    pond = pd.to_numeric(df["PondID"], errors="coerce")
+    keep = pond.notna() & (pond % 1 == 0)
+    df = df[keep.to_numpy()].copy()
+    df["PondID"] = pond[keep].astype(np.int64).to_numpy()
+    return pond_data.sort_ponds(df)
+
+
+# --- CACHED PIPELINE ---
+def upload_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _upload_paths(digest: str, cache_dir: str):
+    # Own key space: cleaned uploads differ from the plain workbook cache
+    key = hashlib.sha256(f"upload|{digest}".encode("utf-8")).hexdigest()
+    parquet = pond_data._cache_path(key, cache_dir)
+    return parquet, os.path.splitext(parquet)[0] + ".issues.json"
+
+
+def load_upload(data: bytes, digest: str = None, cache_dir: str = pond_data.CACHE_DIR):
+    """Parse, validate and cache uploaded workbook bytes.
+
+    Returns ``(df, missing_columns, issues)``; ``df`` is ``None`` when required
+    columns are missing. Identical bytes are served from the cache.
+    """
+    digest = digest or upload_digest(data)
+    parquet_path, issues_path = _upload_paths(digest, cache_dir)
+
+    report = pond_data._read_manifest(issues_path)
+    if report is not None and os.path.exists(parquet_path):
+        try:
+            df = pd.read_parquet(parquet_path)
+            return df, [], pd.DataFrame(report["issues"], columns=ISSUE_COLS)
+        except Exception:
+            pass  # unreadable cache -> parse again
+
+    raw = pond_data.read_sheet(io.BytesIO(data), 0, row_numbers=True)
+    missing, issues = validate_pond_frame(raw)
+    if missing:
+        return None, missing, issues
+
+    df = clean_pond_frame(raw)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if pond_data._write_parquet(df, parquet_path):
+            pond_data._atomic_write_json(issues_path, {
+                "sha256": digest,
+                "rows": len(df),
+                "issues": issues.to_dict("records"),
+            })
+    except OSError:
+        pass  # read-only data directory: the upload is just not cached
+    return df, [], issues
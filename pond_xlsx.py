@@ -0,0 +1,446 @@
+"""Streaming reader for large pond workbooks.
+
+``pd.read_excel`` goes through openpyxl, which builds the whole workbook as
+Python cell objects before a DataFrame exists; a district workbook with a
+million rows does not fit a 2 GB container that way, and takes minutes.
+
+An ``.xlsx`` file is a zip of XML parts, so this module decompresses the
+sheet XML in fixed-size chunks (cut at ``</row>`` boundaries) and turns each
+chunk into typed column arrays: one C-level regex pass extracts every cell,
+and types are resolved per column with numpy/pandas instead of per cell.
+Each chunk becomes one DataFrame batch, so peak memory is one chunk's cells
+plus the columns built so far. Cells the fast pattern does not cover (rich
+text, unusual attribute order, namespace prefixes) send that chunk, or the
+whole sheet, through ``ElementTree.iterparse`` instead.
+
+Only cell values are read (inline strings, shared strings, numbers, booleans,
+cached formula results). Of the styles, only the number formats are used:
+numbers in a date-formatted cell (e.g. a ``Month_Year`` Excel turned into a
+date) become timestamps, as with ``read_excel``. Fully blank rows are skipped.
+"""
+import html
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+CHUNK_BYTES = 4 << 20  # decompressed XML per batch (~30k pond rows)
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS = "{" + _MAIN_NS + "}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# One cell in the schema's attribute order (r, s, t), optional formula, then
+# either a <v> value or a plain inline string. Groups: col, row, style, type, v, text.
+_CELL_RE = re.compile(
+    r'<c r="([A-Z]+)(\d+)"(?: s="(\d+)")?(?: t="(\w+)")?(?: [^>]*?)?'
+    r'(?:/>|>(?:<f\b[^>]*?(?:/>|>[^<]*</f>))?'
+    r'(?:<v>([^<]*)</v>|<is><t(?: [^>]*)?>([^<]*)</t></is>)?</c>)'
+)
+_COL_RE = re.compile(r"[A-Z]+")
+
+_NUMERIC_KINDS = ("", "n")
+_TEXT_KINDS = ("inlineStr", "str", "d")
+
+# Built-in number formats that display a date (m/d/yyyy ... m/d/yy h:mm) or a time
+_DATE_FORMAT_IDS = set(range(14, 23)) | set(range(45, 48))
+# Date/time tokens left in a custom format once quoted text, [colours] and \-escapes are removed
+_FORMAT_LITERAL_RE = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.|_.|\*.')
+_DATE_TOKEN_RE = re.compile(r"[dmyhs]")
+# Windows-epoch serial 0; serials before 60 are one day off (Excel's fictional 1900-02-29)
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+
+# --- WORKBOOK PARTS ---
+def _col_index(ref: str) -> int:
+    """``"A1"`` -> 0, ``"AB12"`` -> 27."""
+    idx = 0
+    for ch in _COL_RE.match(ref).group():
+        idx = idx * 26 + ord(ch) - 64
+    return idx - 1
+
+
+def _sheet_parts(zf: zipfile.ZipFile) -> dict:
+    """Sheet name -> worksheet XML path inside the zip, in workbook order."""
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): r.get("Target") for r in rels.iter(f"{_PKG_REL_NS}Relationship")}
+
+    parts = {}
+    for sheet in workbook.iter(f"{_NS}sheet"):
+        target = targets[sheet.get(f"{_REL_NS}id")]
+        # Targets are either absolute ("/xl/worksheets/...") or relative to xl/
+        path = target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+        parts[sheet.get("name")] = posixpath.normpath(path)
+    return parts
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> np.ndarray:
+    try:
+        f = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return np.array([], dtype=object)
+    strings = []
+    with f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == f"{_NS}si":
+                # Rich text is split over several <r><t> runs
+                strings.append("".join(t.text or "" for t in elem.iter(f"{_NS}t")))
+                elem.clear()
+    return np.array(strings, dtype=object)
+
+
+def _date_styles(zf: zipfile.ZipFile) -> frozenset:
+    """Cell style indices (``s="..."``, as strings) whose number format is a date."""
+    try:
+        root = ET.fromstring(zf.read("xl/styles.xml"))
+    except KeyError:
+        return frozenset()
+    date_formats = set(_DATE_FORMAT_IDS)
+    for fmt in root.iter(f"{_NS}numFmt"):
+        code = _FORMAT_LITERAL_RE.sub("", fmt.get("formatCode", "")).lower()
+        if _DATE_TOKEN_RE.search(code):
+            date_formats.add(int(fmt.get("numFmtId")))
+    xfs = root.find(f"{_NS}cellXfs")
+    if xfs is None:
+        return frozenset()
+    return frozenset(str(i) for i, xf in enumerate(xfs.iter(f"{_NS}xf"))
+                     if int(xf.get("numFmtId", 0)) in date_formats)
+
+
+def _excel_dates(serials: np.ndarray) -> np.ndarray:
+    """Excel serial day numbers -> datetime64 (rounded to the millisecond, like openpyxl)."""
+    serials = np.asarray(serials, dtype=float)
+    serials = serials + ((serials > 0) & (serials < 60))
+    return (_EXCEL_EPOCH + pd.to_timedelta(serials, unit="D")).round("ms").to_numpy()
+
+
+def sheet_names(source) -> list:
+    """Sheet names of an xlsx path or file-like object, in workbook order."""
+    with zipfile.ZipFile(source) as zf:
+        return list(_sheet_parts(zf))
+
+
+# --- CHUNK DECODING ---
+def _xml_chunks(f, chunk_bytes: int):
+    """Decoded runs of complete ``<row>`` elements (plus the sheet head/tail)."""
+    tail = b""
+    while True:
+        block = f.read(chunk_bytes)
+        if not block:
+            break
+        buf = tail + block
+        cut = buf.rfind(b"</row>")
+        if cut < 0:
+            tail = buf
+            continue
+        cut += len(b"</row>")
+        yield buf[:cut].decode("utf-8")
+        tail = buf[cut:]
+    if tail:
+        yield tail.decode("utf-8")
+
+
+def _unescape(values: np.ndarray) -> np.ndarray:
+    """Resolve XML entities (``&gt;``, ``&amp;``...) where present."""
+    s = pd.Series(values, dtype=object)
+    has_entity = s.str.contains("&", regex=False, na=False).to_numpy()
+    if has_entity.any():
+        values = values.copy()
+        values[has_entity] = [html.unescape(v) for v in values[has_entity]]
+    return values
+
+
+def _numbers(raw: np.ndarray):
+    """Parse numeric cell text; whole numbers stay int64 (ID columns), as with openpyxl."""
+    present = raw != ""
+    joined = "".join(raw)
+    if present.all() and "." not in joined and "e" not in joined and "E" not in joined:
+        return raw.astype(np.int64)
+    out = np.full(len(raw), np.nan)
+    out[present] = raw[present].astype(float)  # float() per value: exact round-trip
+    return out
+
+
+def _column_values(kinds, raw, text, shared, dated):
+    """Typed values for one column's cells (all arrays aligned).
+
+    ``dated`` marks cells with a date number format; their numbers become dates.
+    """
+    # Empty cells (e.g. <c t="inlineStr"></c>) are missing, as in read_excel
+    blank = (raw == "") & (text == "")
+    numeric = np.isin(kinds, _NUMERIC_KINDS)
+    dates = numeric & dated & ~blank
+    if (numeric | blank).all():
+        if not dates.any():
+            return _numbers(raw)
+        if (dates | blank).all():
+            stamps = _excel_dates(raw[dates])
+            out = np.full(len(raw), np.datetime64("NaT"), dtype=stamps.dtype)
+            out[dates] = stamps
+            return out
+
+    out = np.full(len(kinds), None, dtype=object)
+    num = numeric & ~blank & ~dates
+    if num.any():
+        out[num] = _numbers(raw[num]).astype(object)
+    if dates.any():
+        out[dates] = list(pd.DatetimeIndex(_excel_dates(raw[dates])))
+
+    inline = (kinds == "inlineStr") & ~blank
+    out[inline] = _unescape(text[inline])
+    other_text = np.isin(kinds, _TEXT_KINDS) & (kinds != "inlineStr") & ~blank
+    out[other_text] = _unescape(raw[other_text])
+
+    shared_cells = (kinds == "s") & ~blank
+    if shared_cells.any():
+        out[shared_cells] = shared[raw[shared_cells].astype(np.int64)]
+
+    booleans = (kinds == "b") & ~blank
+    out[booleans] = raw[booleans] == "1"
+    # "e" (#N/A, #DIV/0!...) stays None
+    return out
+
+
+def _parse_chunk_fast(text: str, shared, date_styles):
+    """``(sheet_rows, {col: (row_positions, values)})`` or ``None`` if not covered.
+
+    ``sheet_rows`` holds the sheet's own (1-based) row number for each position.
+    """
+    cells = _CELL_RE.findall(text)
+    if len(cells) != text.count("<c ") or not cells:
+        return None
+
+    cells = np.array(cells, dtype=object)
+    dated = np.isin(cells[:, 2], list(date_styles)) if date_styles else np.zeros(len(cells), dtype=bool)
+    rows = cells[:, 1]
+    new_row = np.r_[True, rows[1:] != rows[:-1]]
+    row_pos = np.cumsum(new_row) - 1
+
+    columns = {}
+    col_codes, letters = pd.factorize(cells[:, 0])
+    for code, letter in enumerate(letters):
+        idx = np.flatnonzero(col_codes == code)
+        values = _column_values(cells[idx, 3], cells[idx, 4], cells[idx, 5], shared, dated[idx])
+        columns[_col_index(letter)] = (row_pos[idx], values)
+    return rows[new_row].astype(np.int64), columns
+
+
+def _parse_chunk_etree(text: str, shared, date_styles, last_row: int = 0):
+    """Same output as ``_parse_chunk_fast`` via a real XML parser."""
+    root = ET.fromstring(f'<sheetData xmlns="{_MAIN_NS}">{text}</sheetData>')
+    return _rows_to_columns(_etree_rows(root.iter(f"{_NS}row"), shared, date_styles, last_row))
+
+
+def _etree_rows(rows, shared, date_styles, last_row: int = 0):
+    """``(sheet_row, {col: value})`` per row; rows without ``r`` follow the previous one."""
+    for row in rows:
+        ref = row.get("r")
+        last_row = int(ref) if ref else last_row + 1
+        values = {}
+        for pos, cell in enumerate(row.iter(f"{_NS}c")):
+            ref = cell.get("r")
+            values[_col_index(ref) if ref else pos] = _etree_value(cell, shared, date_styles)
+        yield last_row, values
+
+
+def _etree_value(cell, shared, date_styles):
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        inline = cell.find(f"{_NS}is")
+        text = "" if inline is None else "".join(t.text or "" for t in inline.iter(f"{_NS}t"))
+        return text or None
+    v = cell.find(f"{_NS}v")
+    if not (v is not None and v.text):
+        return None
+    if kind == "n":
+        if cell.get("s") in date_styles:
+            return pd.Timestamp(_excel_dates([v.text])[0])
+        return _numbers(np.array([v.text], dtype=object))[0]
+    if kind == "s":
+        return shared[int(v.text)]
+    if kind == "b":
+        return v.text == "1"
+    if kind == "e":
+        return None
+    return v.text
+
+
+def _rows_to_columns(rows):
+    columns = {}
+    sheet_rows = []
+    for pos, (sheet_row, values) in enumerate(rows):
+        for col, value in values.items():
+            positions, vals = columns.setdefault(col, ([], []))
+            positions.append(pos)
+            vals.append(value)
+        sheet_rows.append(sheet_row)
+    return np.array(sheet_rows, dtype=np.int64), {
+        col: (np.array(p, dtype=np.int64), pd.Series(v, dtype=object).infer_objects().to_numpy())
+        for col, (p, v) in columns.items()
+    }
+
+
+def _iter_sheet_etree(f, shared, date_styles, chunk_rows: int = 30_000):
+    """Whole-sheet fallback: ``iterparse``, dropping each row once read."""
+    batch = []
+    last_row = 0
+    sheet_data = None
+    for event, elem in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            if elem.tag == f"{_NS}sheetData":
+                sheet_data = elem
+            continue
+        if elem.tag != f"{_NS}row":
+            continue
+        batch.extend(_etree_rows([elem], shared, date_styles, last_row))
+        last_row = batch[-1][0]
+        sheet_data.clear()  # the tree never grows past one row
+        if len(batch) >= chunk_rows:
+            yield _rows_to_columns(batch)
+            batch = []
+    if batch:
+        yield _rows_to_columns(batch)
+
+
+# --- STREAMING ---
+class _ReplayReader:
+    """File-like ``read()`` that returns bytes already read from ``f``, then the rest of ``f``."""
+
+    def __init__(self, head: bytes, f):
+        self._head = head
+        self._pos = 0
+        self._f = f
+
+    def read(self, size: int = -1) -> bytes:
+        if self._pos < len(self._head):
+            if size is None or size < 0:
+                out = self._head[self._pos:] + self._f.read()
+                self._pos = len(self._head)
+                return out
+            out = self._head[self._pos:self._pos + size]
+            self._pos += len(out)
+            return out
+        return self._f.read(size)
+
+
+def _iter_column_chunks(f, shared, date_styles, chunk_bytes: int):
+    # Sniff the sheet head to pick a path; the sheet data starts within a few KB
+    head = b""
+    while b"sheetData" not in head:
+        block = f.read(chunk_bytes)
+        if not block:
+            break
+        head += block
+    f = _ReplayReader(head, f)
+    if b"<sheetData" not in head:
+        # Prefixed or otherwise unusual sheet XML (rows do not end in a plain
+        # ``</row>``, so it cannot be chunked): iterparse reads the zip stream directly
+        yield from _iter_sheet_etree(f, shared, date_styles)
+        return
+
+    last_row = 0
+    for text in _xml_chunks(f, chunk_bytes):
+        start = text.find("<row")
+        if start < 0:
+            continue
+        end = text.rfind("</row>") + len("</row>")
+        rows_xml = text[start:end]
+        parsed = _parse_chunk_fast(rows_xml, shared, date_styles)
+        if parsed is None:
+            parsed = _parse_chunk_etree(rows_xml, shared, date_styles, last_row)
+        if len(parsed[0]):
+            last_row = int(parsed[0][-1])
+        yield parsed
+
+
+def _frame(sheet_rows: np.ndarray, columns: dict, width: int) -> pd.DataFrame:
+    """Batch frame indexed by sheet row number; fully blank rows are dropped."""
+    n_rows = len(sheet_rows)
+    data = {}
+    for col in range(width):
+        if col not in columns:
+            data[col] = np.full(n_rows, np.nan)
+            continue
+        positions, values = columns[col]
+        if len(positions) == n_rows:
+            data[col] = values
+        else:
+            if values.dtype.kind == "M":
+                filled = np.full(n_rows, np.datetime64("NaT"), dtype=values.dtype)
+            else:
+                filled = np.full(n_rows, None if values.dtype == object else np.nan,
+                                 dtype=object if values.dtype == object else float)
+            filled[positions] = values
+            data[col] = filled
+    # The header row can leave a numeric column object-typed in the first batch
+    frame = pd.DataFrame(data, index=sheet_rows).infer_objects()
+    return frame.dropna(how="all")
+
+
+def _header(values: dict, width: int) -> list:
+    """Header names; blank or repeated ones get pandas-style placeholders."""
+    header, seen = [], {}
+    for i in range(width):
+        name = values.get(i)
+        name = f"Unnamed: {i}" if name is None or name != name else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def iter_sheet_batches(source, sheet=0, chunk_bytes: int = CHUNK_BYTES):
+    """Yield the sheet as DataFrames, one per ``chunk_bytes`` of sheet XML.
+
+    ``sheet`` is a sheet name or position; ``source`` is a path or a binary
+    file-like object. The first row is the header. Frames are indexed by the
+    sheet's (1-based) row number, so skipped blank rows leave gaps.
+    """
+    with zipfile.ZipFile(source) as zf:
+        parts = _sheet_parts(zf)
+        names = list(parts)
+        name = names[sheet] if isinstance(sheet, int) else sheet
+        if name not in parts:
+            raise ValueError(f"Worksheet '{name}' not found. Available: {', '.join(names)}")
+        shared = _shared_strings(zf)
+        date_styles = _date_styles(zf)
+
+        header = None
+        with zf.open(parts[name]) as f:
+            for sheet_rows, columns in _iter_column_chunks(f, shared, date_styles, chunk_bytes):
+                if header is None:
+                    # First row of the sheet is the header
+                    first = {col: vals[0] for col, (pos, vals) in columns.items()
+                             if len(pos) and pos[0] == 0}
+                    header = _header(first, max(columns) + 1)
+                    columns = {col: (pos[pos > 0] - 1, vals[pos > 0])
+                               for col, (pos, vals) in columns.items()}
+                    sheet_rows = sheet_rows[1:]
+                    if not len(sheet_rows):
+                        continue
+                width = len(header)
+                frame = _frame(sheet_rows, {c: v for c, v in columns.items() if c < width}, width)
+                frame.columns = header
+                yield frame
+
+
+def read_sheet(source, sheet=0, chunk_bytes: int = CHUNK_BYTES, row_numbers: bool = False) -> pd.DataFrame:
+    """Whole sheet as one DataFrame, built batch by batch.
+
+    With ``row_numbers`` the index is the sheet row of each record (as in
+    ``iter_sheet_batches``) instead of a 0-based range.
+    """
+    batches = list(iter_sheet_batches(source, sheet, chunk_bytes))
+    if not batches:
+        return pd.DataFrame()
+    if len(batches) == 1:
+        return batches[0] if row_numbers else batches[0].reset_index(drop=True)
+    return pd.concat(batches, ignore_index=not row_numbers)
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pond_data  # noqa: E402
+
+
+@pytest.fixture
+def raw_ponds():
+    """Raw workbook rows (original column names): 4 ponds x 6 months."""
+    rng = np.random.default_rng(0)
+    n_ponds, n_months = 4, 6
+    n = n_ponds * n_months
+    months = pd.period_range("2024-01", periods=n_months, freq="M").strftime("%Y-%m")
+    return pd.DataFrame({
+        "Pond_ID": np.arange(1, n_ponds + 1).repeat(n_months),
+        "Month_Year": np.tile(np.asarray(months), n_ponds),
+        "Status": np.where(np.arange(n) % 3 == 0, "Fallow", "Water Present - High Confidence"),
+        "Reason": "Water Presence: Yes | Mean>0",
+        "NDVI_Mean": rng.normal(0.2, 0.1, n).round(4),
+        "NDTI_Mean": rng.normal(-0.1, 0.05, n).round(4),
+        "VV_Mean": rng.normal(-20, 2, n).round(4),
+    })
+
+
+@pytest.fixture
+def ponds(raw_ponds):
+    """The same rows normalized as the apps load them."""
+    return pond_data.normalize_pond_frame(raw_ponds)
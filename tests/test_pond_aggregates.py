@@ -0,0 +1,57 @@
+import pytest
+
+import pond_aggregates
+import pond_data
+
+
+def test_sync_matches_full_build(ponds, tmp_path):
+    store = str(tmp_path / "agg.parquet")
+    agg = pond_aggregates.sync_pond_aggregates(ponds, store)
+    expected = pond_aggregates.build_pond_aggregates(ponds)
+    assert agg["FallowMonths"].tolist() == expected["FallowMonths"].tolist()
+    # Unchanged data is served from the store
+    assert pond_aggregates.sync_pond_aggregates(ponds, store).equals(agg)
+
+
+def test_sync_rebuilds_edited_month_with_same_row_count(raw_ponds, tmp_path):
+    store = str(tmp_path / "agg.parquet")
+    pond_aggregates.sync_pond_aggregates(pond_data.normalize_pond_frame(raw_ponds), store)
+
+    # Corrected workbook: every Status edited, no month gains or loses rows
+    raw_ponds["Status"] = "Fallow"
+    agg = pond_aggregates.sync_pond_aggregates(pond_data.normalize_pond_frame(raw_ponds), store)
+
+    assert (agg["FallowMonths"] == agg["TotalMonths"]).all()
+    assert (agg["WaterMonths"] == 0).all()
+
+
+def test_append_month_batch_rejects_known_month(ponds, tmp_path):
+    store = str(tmp_path / "agg.parquet")
+    first = ponds[ponds["MonthYear"] != "2024-06"]
+    pond_aggregates.append_month_batch(first, store)
+    agg = pond_aggregates.append_month_batch(ponds[ponds["MonthYear"] == "2024-06"], store)
+    assert int(agg["TotalMonths"].sum()) == len(ponds)
+
+    with pytest.raises(ValueError, match="already aggregated"):
+        pond_aggregates.append_month_batch(ponds[ponds["MonthYear"] == "2024-06"], store)
+
+
+def test_each_source_keeps_its_own_store(ponds, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    other = ponds[ponds["PondID"] != 1]
+    assert pond_aggregates.store_path_for("a.xlsx") != pond_aggregates.store_path_for("b.xlsx")
+
+    pond_aggregates.sync_pond_aggregates(ponds, source="a.xlsx")
+    pond_aggregates.sync_pond_aggregates(other, source="b.xlsx")
+
+    builds = []
+    build = pond_aggregates.build_pond_aggregates
+
+    def counting_build(df):
+        builds.append(len(df))
+        return build(df)
+
+    monkeypatch.setattr(pond_aggregates, "build_pond_aggregates", counting_build)
+    agg = pond_aggregates.sync_pond_aggregates(ponds, source="a.xlsx")
+    assert builds == []  # switching back did not rebuild
+    assert int(agg["TotalMonths"].sum()) == len(ponds)
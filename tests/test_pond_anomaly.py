@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pond_anomaly
+
+
+@pytest.mark.parametrize("method", ["ewma", "rolling"])
+def test_trailing_detectors_skip_rows_without_a_pond(ponds, method):
+    df = ponds.copy()
+    df["NDVIMean"] = 0.3 + 0.01 * (np.arange(len(df)) % 5)
+    df.loc[df.index[-1], "NDVIMean"] = -0.5  # a drop the detector should flag
+    orphan = df.iloc[[0]].assign(PondID=np.nan, NDVIMean=-5.0)
+    with_orphan = pd.concat([df, orphan], ignore_index=True)
+
+    expected = pond_anomaly.detect_anomalies(df, method, min_obs=3)
+    got = pond_anomaly.detect_anomalies(with_orphan, method, min_obs=3)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)  # PondID is float with a NaN
+
+
+def test_multivariate_uses_the_metrics_present(ponds):
+    # Optical-only workbook: no NDWI / VH columns
+    assert "VHMean" not in ponds.columns
+    got = pond_anomaly.detect_anomalies(ponds, "multivariate", min_obs=3)
+    assert list(got.columns[:2]) == ["PondID", "Date"]
+
+
+def test_multivariate_needs_two_metrics(ponds):
+    with pytest.raises(ValueError, match="at least two"):
+        pond_anomaly.detect_anomalies(ponds.drop(columns=["NDTIMean", "VVMean"]), "multivariate")
+
+
+def test_multivariate_skips_rows_without_a_pond(ponds):
+    orphan = ponds.iloc[[0]].assign(PondID=np.nan, NDVIMean=-5.0)
+    expected = pond_anomaly.detect_anomalies(ponds, "multivariate", min_obs=3, threshold=1.0)
+    got = pond_anomaly.detect_anomalies(pd.concat([ponds, orphan], ignore_index=True),
+                                        "multivariate", min_obs=3, threshold=1.0)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
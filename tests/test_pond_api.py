@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+aiohttp_test_utils = pytest.importorskip("aiohttp.test_utils")
+
+import pond_api  # noqa: E402
+import pond_cache  # noqa: E402
+
+
+@pytest.fixture
+def workbook(raw_ponds, tmp_path, monkeypatch):
+    # Caches (data/.cache, shared disk cache) land in the temp dir
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(pond_cache.CACHE_URL_ENV, raising=False)
+    monkeypatch.setattr(pond_cache, "_BACKEND", None)
+    path = tmp_path / "ponds.xlsx"
+    raw_ponds.to_excel(path, index=False)
+    return str(path)
+
+
+def get(source, url):
+    async def fetch():
+        client = aiohttp_test_utils.TestClient(aiohttp_test_utils.TestServer(pond_api.create_app(source)))
+        await client.start_server()
+        try:
+            resp = await client.get(url)
+            body = await resp.json() if resp.status == 200 else await resp.text()
+            return resp.status, body
+        finally:
+            await client.close()
+    return asyncio.run(fetch())
+
+
+def test_observations_without_date_window(workbook):
+    status, body = get(workbook, "/ponds/1/observations")
+    assert status == 200, body
+    assert body["total"] == 6
+    assert [row["MonthYear"] for row in body["items"]][0] == "2024-01"
+
+
+def test_observations_with_open_start(workbook):
+    status, body = get(workbook, "/ponds/1/observations?end=2024-03")
+    assert status == 200, body
+    assert [row["MonthYear"] for row in body["items"]] == ["2024-01", "2024-02", "2024-03"]
+
+
+def test_unknown_pond(workbook):
+    status, _ = get(workbook, "/ponds/999/observations")
+    assert status == 404
+
+
+def test_new_data_version_gets_fresh_tables(workbook, monkeypatch):
+    live = pond_api.LiveTables(workbook)
+    old = live.refresh()
+    assert old.version is not None
+
+    stored = []
+    memoize = pond_cache.memoize
+
+    def recording_memoize(name, version, *args, **kwargs):
+        stored.append(version)
+        return memoize(name, version, *args, **kwargs)
+
+    monkeypatch.setattr(pond_cache, "memoize", recording_memoize)
+    monkeypatch.setattr(pond_api.pond_data, "data_version", lambda source: "next-version")
+    live.checked = 0.0
+    new = live.refresh()
+
+    # A build that started before the swap stays with the version it started on
+    old.get("summary")
+    assert new is not old and new.version == "next-version"
+    assert new.tables == {}
+    assert set(stored) == {old.version}
+
+
+@pytest.mark.parametrize("end, months", [
+    ("2024", 6),
+    ("2024-02", 2),
+    ("2024-01-15", 1),  # a full date is taken as is
+])
+def test_end_covers_the_whole_year_or_month(workbook, end, months):
+    status, body = get(workbook, f"/ponds/1/observations?end={end}")
+    assert status == 200, body
+    assert body["total"] == months
+
+
+@pytest.mark.parametrize("value", ["June 2024", "2024-6", "yesterday", "2024-13"])
+def test_malformed_dates_are_rejected(workbook, value):
+    status, body = get(workbook, f"/kpis?start={value}")
+    assert status == 400
+    assert "YYYY-MM" in body
+
+
+def test_multivariate_without_enough_metrics_is_a_bad_request(raw_ponds, workbook):
+    raw_ponds.drop(columns=["NDTI_Mean", "VV_Mean"]).to_excel(workbook, index=False)
+    status, body = get(workbook, "/anomalies?method=multivariate")
+    assert status == 400
+    assert "at least two" in body
@@ -0,0 +1,50 @@
+import pytest
+
+import pond_cache
+
+
+def test_memoize_hits_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pond_cache, "_BACKEND", pond_cache.DiskCache(str(tmp_path)))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"rows": 3}
+
+    assert pond_cache.memoize("table", "data-v1", compute) == {"rows": 3}
+    assert pond_cache.memoize("table", "data-v1", compute) == {"rows": 3}
+    assert len(calls) == 1
+
+
+def test_logic_change_misses_old_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(pond_cache, "_BACKEND", pond_cache.DiskCache(str(tmp_path)))
+    pond_cache.memoize("table", "data-v1", lambda: "old thresholds")
+
+    monkeypatch.setattr(pond_cache, "LOGIC_VERSION", "edited")
+    assert pond_cache.memoize("table", "data-v1", lambda: "new thresholds") == "new thresholds"
+
+
+def test_logic_version_tracks_module_source(tmp_path, monkeypatch):
+    module = tmp_path / "pond_rules_demo.py"
+    module.write_text("STABLE_RATIO = 0.7\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    before = pond_cache._logic_version(("pond_rules_demo",))
+
+    module.write_text("STABLE_RATIO = 0.75\n")
+    assert pond_cache._logic_version(("pond_rules_demo",)) != before
+
+
+def test_unavailable_backend_falls_back_to_no_cache(raw_ponds, tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.chdir(tmp_path)  # pond_data's own cache goes to ./data/.cache
+    monkeypatch.setattr(pond_cache, "_BACKEND", None)
+    monkeypatch.setenv(pond_cache.CACHE_URL_ENV, f"disk://{blocker / 'shared'}")
+    source = tmp_path / "ponds.xlsx"
+    raw_ponds.to_excel(source, index=False)
+
+    with pytest.warns(UserWarning, match="unavailable"):
+        df = pond_cache.load_dataset(str(source))
+    assert isinstance(pond_cache.get_cache(), pond_cache.NullCache)
+    assert len(df) == len(raw_ponds)
+    assert pond_cache.memoize("table", "data-v1", lambda: 42) == 42
@@ -0,0 +1,29 @@
+import pandas as pd
+
+import pond_data
+
+
+def _workbook(raw_ponds, tmp_path):
+    path = tmp_path / "ponds.xlsx"
+    raw_ponds.to_excel(path, index=False)
+    return str(path)
+
+
+def test_unwritable_cache_dir_still_loads(raw_ponds, tmp_path):
+    source = _workbook(raw_ponds, tmp_path)
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+
+    df = pond_data.load_pond_data(source, cache_dir=str(blocker / "cache"))
+    pd.testing.assert_frame_equal(df, pond_data.read_pond_workbook(source))
+
+
+def test_failed_manifest_write_still_loads(raw_ponds, tmp_path, monkeypatch):
+    source = _workbook(raw_ponds, tmp_path)
+
+    def refuse(path, payload):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(pond_data, "_atomic_write_json", refuse)
+    df = pond_data.load_pond_data(source, cache_dir=str(tmp_path / "cache"))
+    assert len(df) == len(raw_ponds)
@@ -0,0 +1,45 @@
+import io
+
+from openpyxl import Workbook
+
+import pond_upload
+
+HEADER = ["Pond_ID", "Month_Year", "Status", "Reason", "NDVI_Mean", "NDTI_Mean", "VV_Mean"]
+
+
+def _workbook(rows) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    for number, row in rows.items():
+        for col, value in enumerate(row, start=1):
+            ws.cell(number, col, value)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_issues_report_sheet_rows_across_blank_rows(tmp_path):
+    ok = [1, "2024-01", "Fallow", "Water Presence: No", 0.3, -0.1, -20.0]
+    data = _workbook({
+        1: HEADER,
+        2: ok,
+        # sheet rows 3-4 left blank
+        5: [1, "2024-02", "Fallow", "Water Presence: No", "n/a", -0.1, -20.0],
+        6: [2, "Feb 2024", "Fallow", "Water Presence: No", 0.3, -0.1, -20.0],
+    })
+
+    df, missing, issues = pond_upload.load_upload(data, cache_dir=str(tmp_path))
+    assert missing == []
+    assert len(df) == 3
+    got = issues[["Row", "Column", "Value"]].values.tolist()
+    assert got == [[5, "NDVIMean", "n/a"], [6, "MonthYear", "Feb 2024"]]
+
+
+def test_unwritable_cache_dir_still_loads(tmp_path):
+    data = _workbook({1: HEADER, 2: [1, "2024-01", "Fallow", "Water Presence: No", 0.3, -0.1, -20.0]})
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+
+    df, missing, issues = pond_upload.load_upload(data, cache_dir=str(blocker / "cache"))
+    assert missing == [] and issues.empty
+    assert df["PondID"].tolist() == [1]
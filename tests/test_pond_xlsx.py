@@ -0,0 +1,109 @@
+import io
+import re
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+
+import pond_data
+import pond_xlsx
+
+
+def _prefix_sheet(src, dest):
+    """Copy a workbook, rewriting sheet1 with an ``x:`` namespace prefix."""
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                xml = data.decode("utf-8")
+                xml = re.sub(r"<(/?)(?!\?)(\w+)([ >/])", r"<\1x:\2\3", xml)
+                xml = xml.replace('xmlns="', 'xmlns:x="', 1)
+                data = xml.encode("utf-8")
+            zout.writestr(item, data)
+
+
+def test_plain_sheet_matches_read_excel(raw_ponds, tmp_path):
+    path = tmp_path / "plain.xlsx"
+    raw_ponds.to_excel(path, index=False)
+    pd.testing.assert_frame_equal(pond_xlsx.read_sheet(str(path)), pd.read_excel(path),
+                                  check_dtype=False)
+
+
+def test_prefixed_sheet_streams_through_etree(raw_ponds, tmp_path):
+    plain, prefixed = tmp_path / "plain.xlsx", tmp_path / "prefixed.xlsx"
+    raw_ponds.to_excel(plain, index=False)
+    _prefix_sheet(plain, prefixed)
+
+    # Tiny chunks: the fallback must work from many pieces, not one joined string
+    got = pond_xlsx.read_sheet(str(prefixed), chunk_bytes=256)
+    pd.testing.assert_frame_equal(got, pd.read_excel(plain), check_dtype=False)
+
+
+def test_replay_reader_returns_head_then_file():
+    reader = pond_xlsx._ReplayReader(b"<a>", io.BytesIO(b"<b/></a>"))
+    assert reader.read(2) == b"<a"
+    assert reader.read(10) == b">"
+    assert reader.read(2) == b"<b"
+    assert reader.read(-1) == b"/></a>"
+    assert reader.read(10) == b""
+
+
+def test_date_formatted_cells_come_back_as_dates(raw_ponds, tmp_path):
+    plain, prefixed = tmp_path / "dates.xlsx", tmp_path / "dates-prefixed.xlsx"
+    raw = raw_ponds.copy()
+    # What Excel stores when someone types 2024-01 into a cell; one text cell left as typed
+    raw["Month_Year"] = pd.to_datetime(raw["Month_Year"], format="%Y-%m").astype(object)
+    raw.loc[3, "Month_Year"] = "2024-04"
+    raw.to_excel(plain, index=False)
+    _prefix_sheet(plain, prefixed)
+    expected = pd.read_excel(plain)
+
+    for path in (plain, prefixed):
+        got = pond_xlsx.read_sheet(str(path))
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+        assert got.loc[0, "Month_Year"] == pd.Timestamp("2024-01-01")
+        assert pond_data.normalize_pond_frame(got)["Date"].notna().all()
+
+
+def test_builtin_date_format_is_recognised(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Month_Year", "NDVI_Mean"])
+    for i in range(12):
+        day = None if i % 3 == 1 else datetime(2024, i + 1, 1)  # some rows have no date cell
+        ws.append([day, i / 10])
+        if day is not None:
+            ws.cell(ws.max_row, 1).number_format = "mm-dd-yy"  # built-in format 14
+    path = tmp_path / "builtin.xlsx"
+    wb.save(path)
+
+    expected = pd.read_excel(path)
+    assert expected["Month_Year"].dtype.kind == "M"
+    # Small chunks also put date columns with gaps in batches without the header row
+    for chunk_bytes in (pond_xlsx.CHUNK_BYTES, 300):
+        got = pond_xlsx.read_sheet(str(path), chunk_bytes=chunk_bytes)
+        assert got["Month_Year"].dtype.kind == "M"
+        pd.testing.assert_series_equal(got["Month_Year"].astype("datetime64[ns]"),
+                                       expected["Month_Year"].astype("datetime64[ns]"))
+        pd.testing.assert_series_equal(got["NDVI_Mean"], expected["NDVI_Mean"])
+
+
+def test_row_numbers_follow_the_sheet_across_blank_rows(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    for number, row in {1: ["Pond_ID", "NDVI_Mean"], 2: [1, 0.1], 5: [2, 0.2], 9: [3, 0.3]}.items():
+        for col, value in enumerate(row, start=1):
+            ws.cell(number, col, value)
+    plain, prefixed = tmp_path / "gaps.xlsx", tmp_path / "gaps-prefixed.xlsx"
+    wb.save(plain)
+    _prefix_sheet(plain, prefixed)
+
+    for path in (plain, prefixed):
+        got = pond_xlsx.read_sheet(str(path), chunk_bytes=200, row_numbers=True)
+        assert list(got.index) == [2, 5, 9]
+        assert list(got["Pond_ID"]) == [1, 2, 3]
+    assert list(pond_xlsx.read_sheet(str(plain)).index) == [0, 1, 2]